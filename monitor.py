@@ -4,27 +4,67 @@ Utility script to monitor and manage the automation system.
 Provides command-line tools for checking status, running manual scripts, and maintenance.
 """
 
+import argparse
+import atexit
 import sqlite3
 import sys
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
-from tabulate import tabulate
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.database.database_manager import DatabaseManager
-from src.modules.fresha_api import FreshaAPIClient
-from src.modules.email_service import EmailService
 from src.config import DATABASE_PATH
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _grid(rows, headers):
+    """Render a fixed-width grid table without tabulate's per-cell
+    type inspection; all cells are stringified exactly once."""
+    str_rows = [[str(c) for c in row] for row in rows]
+    widths = [
+        max(len(str(h)), *(len(r[i]) for r in str_rows)) if str_rows else len(str(h))
+        for i, h in enumerate(headers)
+    ]
+    sep = "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+    head_sep = "+" + "+".join("=" * (w + 2) for w in widths) + "+"
+
+    def fmt(cells):
+        return "| " + " | ".join(c.ljust(w) for c, w in zip(cells, widths)) + " |"
+
+    lines = [sep, fmt([str(h) for h in headers]), head_sep]
+    for r in str_rows:
+        lines.append(fmt(r))
+        lines.append(sep)
+    return "\n".join(lines)
+
+
+def _print_grid_stream(cursor, headers, format_row, chunk_size=1000):
+    """Print cursor rows as grid chunks without materializing the full
+    result set; returns False when the cursor yielded no rows."""
+    printed = False
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        print(_grid([format_row(r) for r in chunk], headers))
+        printed = True
+    return printed
+
+
 class SalonAutomationMonitor:
     def __init__(self):
         self.db = DatabaseManager()
+        # One connection per CLI invocation: keeps SQLite's page cache warm
+        # across subcommand queries instead of reopening the file each time
+        self._conn = self.db._open_connection()
+        # Autocommit mode so read snapshots can be scoped explicitly
+        # with BEGIN DEFERRED / COMMIT where consistency matters
+        self._conn.isolation_level = None
+        atexit.register(self._conn.close)
 
     def print_header(self, title):
         """Print formatted header."""
@@ -36,38 +76,45 @@ class SalonAutomationMonitor:
         """Show current system status."""
         self.print_header("System Status")
 
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Customer count
-            cursor.execute("SELECT COUNT(*) as count FROM customers")
-            customers = cursor.fetchone()["count"]
-
-            # Appointment count
-            cursor.execute("SELECT COUNT(*) as count FROM appointments")
-            appointments = cursor.fetchone()["count"]
-
-            # Pending emails
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM thank_you_emails WHERE status = 'pending'"
-            )
-            pending_thank_you = cursor.fetchone()["count"]
-
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM followup_emails WHERE status = 'pending'"
-            )
-            pending_followup = cursor.fetchone()["count"]
-
-            # Failed emails
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM thank_you_emails WHERE status = 'failed'"
-            )
-            failed_thank_you = cursor.fetchone()["count"]
+        cursor = self._conn.cursor()
+
+        # One deferred read transaction: both queries see the same WAL
+        # snapshot and skip per-statement transaction setup
+        cursor.execute("BEGIN DEFERRED")
+
+        # Pending/failed email counts for both tables in one round-trip
+        cursor.execute(
+            """
+            SELECT 'thank_you' AS kind,
+                   SUM(status = 'pending') AS pending,
+                   SUM(status = 'failed') AS failed
+            FROM thank_you_emails
+            UNION ALL
+            SELECT 'followup',
+                   SUM(status = 'pending'),
+                   SUM(status = 'failed')
+            FROM followup_emails
+            """
+        )
+        email_counts = {
+            row["kind"]: (row["pending"] or 0, row["failed"] or 0)
+            for row in cursor.fetchall()
+        }
+        pending_thank_you, failed_thank_you = email_counts["thank_you"]
+        pending_followup, failed_followup = email_counts["followup"]
+
+        # Customer and appointment totals in a single scalar query
+        cursor.execute(
+            """
+            SELECT (SELECT COUNT(*) FROM customers) AS customers,
+                   (SELECT COUNT(*) FROM appointments) AS appointments
+            """
+        )
+        totals = cursor.fetchone()
+        customers = totals["customers"]
+        appointments = totals["appointments"]
 
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM followup_emails WHERE status = 'failed'"
-            )
-            failed_followup = cursor.fetchone()["count"]
+        cursor.execute("COMMIT")
 
         status_data = [
             ["Customers in Database", customers],
@@ -80,134 +127,123 @@ class SalonAutomationMonitor:
             ["Database Size (MB)", round(DATABASE_PATH.stat().st_size / 1024 / 1024, 2)],
         ]
 
-        print(tabulate(status_data, headers=["Metric", "Value"], tablefmt="grid"))
+        print(_grid(status_data, headers=["Metric", "Value"]))
 
     def show_recent_executions(self, limit=10):
         """Show recent script executions."""
         self.print_header(f"Recent Script Executions (Last {limit})")
 
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT script_name, execution_date, status, emails_sent, 
-                       emails_failed, execution_time_seconds
-                FROM script_logs
-                ORDER BY execution_date DESC
-                LIMIT ?
-                """,
-                (limit,),
-            )
-            rows = cursor.fetchall()
+        cursor = self._conn.cursor()
+        # Plain tuples: sqlite3.Row name lookups cost a per-access probe,
+        # which adds up when thousands of rows are rendered
+        cursor.row_factory = None
+        # Duration is formatted by SQLite's C-level printf so the Python
+        # side is a branch-free tuple copy per row
+        cursor.execute(
+            """
+            SELECT script_name, execution_date, status, emails_sent,
+                   emails_failed,
+                   IIF(execution_time_seconds IS NULL, 'N/A',
+                       printf('%.2fs', execution_time_seconds)) AS duration
+            FROM script_logs
+            ORDER BY execution_date DESC
+            LIMIT ?
+            """,
+            (limit,),
+        )
 
-        if not rows:
+        if not _print_grid_stream(
+            cursor,
+            ["Script", "Execution Time", "Status", "Sent", "Failed", "Duration"],
+            list,
+        ):
             print("No execution logs found.")
-            return
-
-        data = [
-            [
-                row["script_name"],
-                row["execution_date"],
-                row["status"],
-                row["emails_sent"],
-                row["emails_failed"],
-                f"{row['execution_time_seconds']:.2f}s" if row["execution_time_seconds"] else "N/A",
-            ]
-            for row in rows
-        ]
-
-        print(
-            tabulate(
-                data,
-                headers=[
-                    "Script",
-                    "Execution Time",
-                    "Status",
-                    "Sent",
-                    "Failed",
-                    "Duration",
-                ],
-                tablefmt="grid",
-            )
-        )
 
     def show_email_logs(self, limit=20):
         """Show recent email logs."""
         self.print_header(f"Recent Email Activity (Last {limit})")
 
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT email_address, email_type, status, sent_at, error_message
-                FROM email_logs
-                ORDER BY sent_at DESC
-                LIMIT ?
-                """,
-                (limit,),
+        cursor = self._conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(
+            """
+            SELECT email_address, email_type, status, sent_at, error_message
+            FROM email_logs
+            ORDER BY sent_at DESC
+            LIMIT ?
+            """,
+            (limit,),
+        )
+
+        def format_row(row):
+            email_address, email_type, status, sent_at, error_message = row
+            return (
+                email_address,
+                email_type,
+                status,
+                sent_at,
+                error_message[:30] + "..." if error_message else "—",
             )
-            rows = cursor.fetchall()
 
-        if not rows:
+        if not _print_grid_stream(
+            cursor, ["Email", "Type", "Status", "Time", "Error"], format_row
+        ):
             print("No email logs found.")
-            return
-
-        data = [
-            [
-                row["email_address"],
-                row["email_type"],
-                row["status"],
-                row["sent_at"],
-                row["error_message"][:30] + "..." if row["error_message"] else "—",
-            ]
-            for row in rows
-        ]
-
-        print(
-            tabulate(
-                data,
-                headers=["Email", "Type", "Status", "Time", "Error"],
-                tablefmt="grid",
-            )
-        )
 
     def show_failure_analysis(self):
         """Analyze and show failure patterns."""
         self.print_header("Failure Analysis (Last 7 Days)")
 
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Failure rate
-            cursor.execute(
-                """
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'sent' THEN 1 ELSE 0 END) as sent,
-                    SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed
-                FROM email_logs
-                WHERE sent_at >= datetime('now', '-7 days')
-                """
-            )
-            stats = cursor.fetchone()
+        cursor = self._conn.cursor()
 
-            total = stats["total"] or 0
-            sent = stats["sent"] or 0
-            failed = stats["failed"] or 0
-            success_rate = (sent / total * 100) if total > 0 else 0
+        # The cutoff is computed once in Python and bound as a plain
+        # range parameter, keeping the bare sent_at column eligible for
+        # the (sent_at, status) index instead of re-parsing
+        # datetime('now', ...) inside SQLite
+        threshold = (datetime.utcnow() - timedelta(days=7)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
 
-            # Top errors
-            cursor.execute(
-                """
-                SELECT error_message, COUNT(*) as count
+        # One query over a shared CTE so the 7-day slice of email_logs is
+        # scanned once for both the rate totals and the top-error buckets.
+        # Errors are grouped on the truncated message so variants that
+        # only differ past 50 chars (hosts, ids) aggregate together.
+        cursor.execute(
+            """
+            WITH recent AS (
+                SELECT status, error_message
                 FROM email_logs
-                WHERE status = 'failed' AND sent_at >= datetime('now', '-7 days')
-                GROUP BY error_message
+                WHERE sent_at >= ?
+            )
+            SELECT 'totals' AS kind,
+                   NULL AS error_message,
+                   COUNT(*) AS count,
+                   SUM(status = 'sent') AS sent,
+                   SUM(status = 'failed') AS failed
+            FROM recent
+            UNION ALL
+            SELECT 'error', error_message, count, NULL, NULL
+            FROM (
+                SELECT substr(error_message, 1, 50) AS error_message,
+                       COUNT(*) AS count
+                FROM recent
+                WHERE status = 'failed'
+                GROUP BY substr(error_message, 1, 50)
                 ORDER BY count DESC
                 LIMIT 5
-                """
             )
-            errors = cursor.fetchall()
+            """,
+            (threshold,),
+        )
+        rows = cursor.fetchall()
+
+        stats = rows[0]
+        errors = rows[1:]
+
+        total = stats["count"] or 0
+        sent = stats["sent"] or 0
+        failed = stats["failed"] or 0
+        success_rate = (sent / total * 100) if total > 0 else 0
 
         print(f"Total Emails Processed: {total}")
         print(f"Successfully Sent: {sent}")
@@ -217,10 +253,10 @@ class SalonAutomationMonitor:
         if errors:
             print("Top Failure Reasons:")
             error_data = [
-                [i + 1, err["error_message"][:50], err["count"]]
+                [i + 1, err["error_message"], err["count"]]
                 for i, err in enumerate(errors)
             ]
-            print(tabulate(error_data, headers=["#", "Error", "Count"], tablefmt="grid"))
+            print(_grid(error_data, headers=["#", "Error", "Count"]))
         else:
             print("✓ No failures in the last 7 days!")
 
@@ -228,6 +264,9 @@ class SalonAutomationMonitor:
         """Test Fresha API connection."""
         self.print_header("Fresha API Connection Test")
 
+        # Imported here so plain status/help invocations skip requests
+        from src.modules.fresha_api import FreshaAPIClient
+
         client = FreshaAPIClient()
         if client.verify_connection():
             print("✓ Fresha API connection successful!")
@@ -247,6 +286,8 @@ class SalonAutomationMonitor:
         """Test email service connection."""
         self.print_header("Email Service Connection Test")
 
+        from src.modules.email_service import EmailService
+
         service = EmailService()
         if not service.sender_email or not service.sender_password:
             print("✗ Email credentials not configured in .env")
@@ -298,35 +339,46 @@ Examples:
 For detailed documentation, see README.md and SETUP_DEPLOYMENT.md
         """)
 
+    def _build_parser(self):
+        """Build the argparse CLI: one subcommand per monitor action."""
+        parser = argparse.ArgumentParser(prog="monitor.py", add_help=False)
+        sub = parser.add_subparsers(dest="command")
+        sub.add_parser("status")
+        executions = sub.add_parser("executions")
+        executions.add_argument("limit", type=int, nargs="?", default=10)
+        emails = sub.add_parser("emails")
+        emails.add_argument("limit", type=int, nargs="?", default=20)
+        sub.add_parser("failures")
+        sub.add_parser("test-fresha")
+        sub.add_parser("test-email")
+        sub.add_parser("backup")
+        sub.add_parser("help")
+        return parser, set(sub.choices)
+
     def run(self):
         """Main execution."""
-        if len(sys.argv) < 2:
+        parser, known_commands = self._build_parser()
+
+        if len(sys.argv) < 2 or sys.argv[1].lower() not in known_commands:
+            if len(sys.argv) >= 2:
+                print(f"Unknown command: {sys.argv[1]}")
             self.show_help()
             return
 
-        command = sys.argv[1].lower()
-
-        if command == "status":
-            self.show_status()
-        elif command == "executions":
-            limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
-            self.show_recent_executions(limit)
-        elif command == "emails":
-            limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
-            self.show_email_logs(limit)
-        elif command == "failures":
-            self.show_failure_analysis()
-        elif command == "test-fresha":
-            self.test_fresha_connection()
-        elif command == "test-email":
-            self.test_email_connection()
-        elif command == "backup":
-            self.backup_database()
-        elif command == "help":
-            self.show_help()
-        else:
-            print(f"Unknown command: {command}")
-            self.show_help()
+        # Arguments are parsed and validated exactly once up front
+        args = parser.parse_args([sys.argv[1].lower()] + sys.argv[2:])
+
+        handlers = {
+            "status": lambda a: self.show_status(),
+            "executions": lambda a: self.show_recent_executions(a.limit),
+            "emails": lambda a: self.show_email_logs(a.limit),
+            "failures": lambda a: self.show_failure_analysis(),
+            "test-fresha": lambda a: self.test_fresha_connection(),
+            "test-email": lambda a: self.test_email_connection(),
+            "backup": lambda a: self.backup_database(),
+            "help": lambda a: self.show_help(),
+        }
+        handlers[args.command](args)
 
 
 if __name__ == "__main__":
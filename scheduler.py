@@ -13,22 +13,31 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.config import THANK_YOU_SEND_TIMES, LOG_DIR, LOG_LEVEL, LOG_FORMAT
+from src.config import THANK_YOU_SEND_TIMES, LOG_DIR, LOG_LEVEL, LOG_FORMAT, ensure_dirs
 from src.scripts.thank_you_emails import ThankYouEmailAutomation
 from src.scripts.followup_emails import FollowUpEmailAutomation
 
 # Setup logging
+ensure_dirs()
 log_file = LOG_DIR / "scheduler.log"
+# Only echo to the console when attached to a terminal; under
+# systemd/cron the StreamHandler would just format every record twice
+handlers = [logging.FileHandler(log_file)]
+if sys.stdout.isatty():
+    handlers.append(logging.StreamHandler())
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL),
     format=LOG_FORMAT,
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler(),
-    ],
+    handlers=handlers,
 )
 logger = logging.getLogger(__name__)
 
+# Instantiated once and reused across runs so constructor work (DB
+# schema check, service setup) is not repeated on every scheduled tick;
+# run() resets per-run stats itself
+_thank_you_automation = ThankYouEmailAutomation()
+_followup_automation = FollowUpEmailAutomation()
+
 
 def run_thank_you_emails():
     """Execute thank-you email script."""
@@ -36,8 +45,7 @@ def run_thank_you_emails():
     logger.info("Executing Thank-You Email Script")
     logger.info("=" * 60)
     try:
-        automation = ThankYouEmailAutomation()
-        automation.run()
+        _thank_you_automation.run()
     except Exception as e:
         logger.error(f"Error in thank-you email script: {e}", exc_info=True)
 
@@ -48,12 +56,20 @@ def run_followup_emails():
     logger.info("Executing Follow-Up Email Script")
     logger.info("=" * 60)
     try:
-        automation = FollowUpEmailAutomation()
-        automation.run()
+        _followup_automation.run()
     except Exception as e:
         logger.error(f"Error in follow-up email script: {e}", exc_info=True)
 
 
+def run_database_maintenance():
+    """Execute daily database maintenance."""
+    logger.info("Running database maintenance")
+    try:
+        _thank_you_automation.db_manager.maintenance()
+    except Exception as e:
+        logger.error(f"Error in database maintenance: {e}", exc_info=True)
+
+
 def schedule_tasks():
     """Configure all scheduled tasks."""
     logger.info("Configuring scheduled tasks...")
@@ -67,6 +83,10 @@ def schedule_tasks():
     schedule.every().day.at("08:00").do(run_followup_emails)
     logger.info("Scheduled follow-up emails at 08:00 daily")
 
+    # Daily WAL checkpoint + vacuum in the quiet overnight window
+    schedule.every().day.at("03:30").do(run_database_maintenance)
+    logger.info("Scheduled database maintenance at 03:30 daily")
+
     logger.info("Task scheduling complete")
 
 
@@ -83,8 +103,15 @@ def main():
 
     try:
         while True:
+            # Sleep until the next job is due instead of polling every
+            # minute; idle_seconds() is None when no jobs are registered
+            idle = schedule.idle_seconds()
+            if idle is None:
+                logger.warning("No scheduled jobs registered, exiting")
+                break
+            if idle > 0:
+                time.sleep(idle)
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
     except KeyboardInterrupt:
         logger.info("Scheduler stopped by user")
     except Exception as e:
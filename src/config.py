@@ -1,30 +1,43 @@
 import os
 from dotenv import load_dotenv
+from functools import lru_cache
 from pathlib import Path
 
+# .env must be loaded eagerly: the configuration constants below read
+# the environment at import time
 load_dotenv()
 
+# Single bound accessor: avoids re-resolving os.getenv -> _Environ per read
+_env = os.environ.get
+
+
+def _bool_env(key, default):
+    return _env(key, default).lower() == "true"
+
 # Project paths
 PROJECT_ROOT = Path(__file__).parent.parent
 LOG_DIR = PROJECT_ROOT / "logs"
 DB_DIR = PROJECT_ROOT / "src" / "database"
 CONFIG_DIR = PROJECT_ROOT / "config"
 
-# Create directories if they don't exist
-LOG_DIR.mkdir(exist_ok=True)
-DB_DIR.mkdir(exist_ok=True)
+
+@lru_cache(maxsize=None)
+def ensure_dirs():
+    """Create the log/db directories once per process, on first use."""
+    LOG_DIR.mkdir(exist_ok=True)
+    DB_DIR.mkdir(exist_ok=True)
 
 # Fresha API Configuration
-FRESHA_API_KEY = os.getenv("FRESHA_API_KEY", "")
-FRESHA_BUSINESS_ID = os.getenv("FRESHA_BUSINESS_ID", "")
+FRESHA_API_KEY = _env("FRESHA_API_KEY", "")
+FRESHA_BUSINESS_ID = _env("FRESHA_BUSINESS_ID", "")
 FRESHA_API_BASE_URL = "https://api.fresha.com/v1"
 
 # Email Configuration
-SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
-SENDER_EMAIL = os.getenv("SENDER_EMAIL", "")
-SENDER_PASSWORD = os.getenv("SENDER_PASSWORD", "")
-SENDER_NAME = os.getenv("SENDER_NAME", "Your Nail Salon")
+SMTP_SERVER = _env("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(_env("SMTP_PORT", 587))
+SENDER_EMAIL = _env("SENDER_EMAIL", "")
+SENDER_PASSWORD = _env("SENDER_PASSWORD", "")
+SENDER_NAME = _env("SENDER_NAME", "Your Nail Salon")
 
 # Email Templates
 THANK_YOU_EMAIL_SUBJECT = "Thank You for Your Visit!"
@@ -65,10 +78,10 @@ DATABASE_BACKUP_PATH = DB_DIR / "backups"
 
 # Logging Configuration
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVEL = _env("LOG_LEVEL", "INFO")
 
 # Headless Mode
-HEADLESS_MODE = os.getenv("HEADLESS_MODE", "true").lower() == "true"
+HEADLESS_MODE = _bool_env("HEADLESS_MODE", "true")
 BROWSER_TIMEOUT = 30000  # 30 seconds in milliseconds
 
 # Retry Configuration
@@ -78,10 +91,11 @@ RETRY_DELAY = 5  # seconds
 # Email Sending Configuration
 BATCH_SIZE = 50  # Send emails in batches of 50
 EMAIL_DELAY_BETWEEN_BATCH = 2  # seconds between batches
+EMAIL_SMTP_CONCURRENCY = 8  # parallel SMTP connections within a batch
 
 # Alert Configuration
-ALERT_EMAIL = os.getenv("ALERT_EMAIL", "")
-ENABLE_ALERTS = os.getenv("ENABLE_ALERTS", "true").lower() == "true"
+ALERT_EMAIL = _env("ALERT_EMAIL", "")
+ENABLE_ALERTS = _bool_env("ENABLE_ALERTS", "true")
 
 # Timezone
-TIMEZONE = os.getenv("TIMEZONE", "UTC")
+TIMEZONE = _env("TIMEZONE", "UTC")
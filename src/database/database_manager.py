@@ -1,154 +1,367 @@
+import queue
 import sqlite3
 import logging
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from contextlib import contextmanager
-from src.config import DATABASE_PATH, DATABASE_BACKUP_PATH
+from src.config import DATABASE_PATH, DATABASE_BACKUP_PATH, ensure_dirs
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on pooled connections; enough for the scheduler plus a
+# couple of concurrent script runs against the same database file
+POOL_SIZE = 4
+
+# Bump whenever _SCHEMA_SQL changes so existing databases re-run it;
+# must match the PRAGMA user_version assignment at the end of the script
+_SCHEMA_VERSION = 2
+
+# Complete schema as one script: executescript parses it in a single
+# pass and BEGIN IMMEDIATE takes the write lock exactly once, instead
+# of ~15 execute calls each being planned and locked individually
+_SCHEMA_SQL = """
+-- Must be set before the first table is created; lets maintenance()
+-- reclaim free pages with incremental_vacuum instead of a full VACUUM.
+-- Databases created before this was added keep auto_vacuum=NONE until
+-- manually VACUUMed, which simply makes that pragma a no-op for them.
+PRAGMA auto_vacuum = INCREMENTAL;
+
+BEGIN IMMEDIATE;
+
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    fresha_customer_id TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER PRIMARY KEY,
+    fresha_appointment_id TEXT UNIQUE NOT NULL,
+    customer_id INTEGER NOT NULL,
+    service_type TEXT,
+    appointment_date TIMESTAMP NOT NULL,
+    completion_date TIMESTAMP,
+    status TEXT DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY(customer_id) REFERENCES customers(id)
+);
+
+CREATE TABLE IF NOT EXISTS thank_you_emails (
+    id INTEGER PRIMARY KEY,
+    appointment_id INTEGER NOT NULL,
+    customer_id INTEGER NOT NULL,
+    email_address TEXT NOT NULL,
+    scheduled_time INTEGER,
+    sent_time TIMESTAMP,
+    status TEXT DEFAULT 'pending',
+    retry_count INTEGER DEFAULT 0,
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY(appointment_id) REFERENCES appointments(id),
+    FOREIGN KEY(customer_id) REFERENCES customers(id)
+);
+
+CREATE TABLE IF NOT EXISTS followup_emails (
+    id INTEGER PRIMARY KEY,
+    appointment_id INTEGER NOT NULL,
+    customer_id INTEGER NOT NULL,
+    email_address TEXT NOT NULL,
+    scheduled_date INTEGER NOT NULL,
+    sent_time TIMESTAMP,
+    status TEXT DEFAULT 'pending',
+    retry_count INTEGER DEFAULT 0,
+    error_message TEXT,
+    feedback_token TEXT UNIQUE,
+    feedback_provided BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY(appointment_id) REFERENCES appointments(id),
+    FOREIGN KEY(customer_id) REFERENCES customers(id)
+);
+
+CREATE TABLE IF NOT EXISTS email_logs (
+    id INTEGER PRIMARY KEY,
+    email_address TEXT NOT NULL,
+    email_type TEXT NOT NULL,
+    subject TEXT,
+    status TEXT,
+    appointment_id INTEGER,
+    sent_at TIMESTAMP,
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS script_logs (
+    id INTEGER PRIMARY KEY,
+    script_name TEXT NOT NULL,
+    execution_date TIMESTAMP NOT NULL,
+    status TEXT NOT NULL,
+    emails_sent INTEGER DEFAULT 0,
+    emails_skipped INTEGER DEFAULT 0,
+    emails_failed INTEGER DEFAULT 0,
+    error_message TEXT,
+    execution_time_seconds FLOAT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_customers_email ON customers(email);
+CREATE INDEX IF NOT EXISTS idx_appointments_customer ON appointments(customer_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments(appointment_date);
+
+-- Composite indexes matching the pending-email pollers' WHERE
+-- (status, scheduled_*, retry_count) and ORDER BY created_at, so the
+-- queries are served from the index without re-sorting every row;
+-- they supersede the old single-column partial status indexes
+DROP INDEX IF EXISTS idx_thank_you_status;
+DROP INDEX IF EXISTS idx_followup_status;
+CREATE INDEX IF NOT EXISTS idx_thank_you_pending
+    ON thank_you_emails(status, scheduled_time, retry_count, created_at);
+CREATE INDEX IF NOT EXISTS idx_followup_pending
+    ON followup_emails(status, scheduled_date, retry_count, created_at);
+
+-- check_duplicate_followup probes on this exact pair
+CREATE INDEX IF NOT EXISTS idx_followup_dup
+    ON followup_emails(customer_id, appointment_id);
+
+-- The follow-up preparation anti-join probes followup_emails by
+-- appointment and range-scans appointments by status + date
+CREATE INDEX IF NOT EXISTS idx_followup_email_appt
+    ON followup_emails(appointment_id);
+CREATE INDEX IF NOT EXISTS idx_appt_status_date
+    ON appointments(status, appointment_date);
+
+-- get_script_stats filters on script_name + execution_date range
+CREATE INDEX IF NOT EXISTS idx_script_logs_name_date
+    ON script_logs(script_name, execution_date);
+
+CREATE INDEX IF NOT EXISTS idx_email_logs_type ON email_logs(email_type);
+
+-- Covers the failure-analysis range scan (sent_at window + status)
+CREATE INDEX IF NOT EXISTS idx_email_logs_sent_at_status
+    ON email_logs(sent_at, status);
+
+-- Migrate rows written before the scheduled columns became integer
+-- epochs: legacy ISO text compares greater than any INTEGER, so the
+-- pending polls' scheduled <= :now predicate would never match them
+-- and those emails would be stranded. Runs only on the version-gated
+-- upgrade path, and typeof() keeps it a no-op on already-converted
+-- rows. The legacy text was written from naive local datetimes, so the
+-- 'utc' modifier makes strftime read it as local time — the same
+-- interpretation datetime.fromisoformat(...).timestamp() uses on the
+-- write path — rather than as UTC.
+UPDATE thank_you_emails
+    SET scheduled_time = CAST(strftime('%s', scheduled_time, 'utc') AS INTEGER)
+    WHERE typeof(scheduled_time) = 'text';
+UPDATE followup_emails
+    SET scheduled_date = CAST(strftime('%s', scheduled_date, 'utc') AS INTEGER)
+    WHERE typeof(scheduled_date) = 'text';
+
+-- Refresh planner statistics so the new indexes get picked
+ANALYZE;
+
+PRAGMA user_version = 2;
+
+COMMIT;
+"""
+
+# Hot-path SQL as module constants: identical statement text on every
+# call lets each pooled connection's prepared-statement cache (see
+# cached_statements in _open_connection) skip the parse/plan step
+SQL_INSERT_THANK_YOU = """
+    INSERT INTO thank_you_emails
+    (appointment_id, customer_id, email_address, scheduled_time, status)
+    VALUES (?, ?, ?, ?, 'pending')
+"""
+
+# The pending polls project only the columns the send loops read;
+# SELECT * dragged error_message TEXT and the rest through the row
+# fetch for every pending email
+SQL_GET_PENDING_THANK_YOU = """
+    SELECT e.id, e.appointment_id, e.customer_id, e.email_address,
+           c.name AS customer_name, e.retry_count
+    FROM thank_you_emails e
+    JOIN customers c ON c.id = e.customer_id
+    WHERE e.status = 'pending'
+    AND e.retry_count < 3
+    AND e.scheduled_time <= ?
+    ORDER BY e.created_at ASC
+"""
+
+SQL_UPDATE_THANK_YOU_STATUS = """
+    UPDATE thank_you_emails
+    SET status = ?, error_message = ?, sent_time = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+SQL_INCREMENT_THANK_YOU_RETRY = """
+    UPDATE thank_you_emails
+    SET retry_count = retry_count + 1
+    WHERE id = ?
+"""
+
+SQL_INSERT_FOLLOWUP = """
+    INSERT OR IGNORE INTO followup_emails
+    (appointment_id, customer_id, email_address, scheduled_date, feedback_token, status)
+    VALUES (?, ?, ?, ?, ?, 'pending')
+"""
+
+SQL_GET_PENDING_FOLLOWUP = """
+    SELECT id, appointment_id, customer_id, email_address, feedback_token,
+           retry_count
+    FROM followup_emails
+    WHERE status = 'pending'
+    AND retry_count < 3
+    AND scheduled_date <= ?
+    ORDER BY created_at ASC
+"""
+
+SQL_UPDATE_FOLLOWUP_STATUS = """
+    UPDATE followup_emails
+    SET status = ?, error_message = ?, sent_time = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+SQL_INCREMENT_FOLLOWUP_RETRY = """
+    UPDATE followup_emails
+    SET retry_count = retry_count + 1
+    WHERE id = ?
+"""
+
+SQL_CHECK_DUPLICATE_FOLLOWUP = """
+    SELECT id FROM followup_emails
+    WHERE customer_id = ? AND appointment_id = ?
+"""
+
+SQL_INSERT_EMAIL_LOG = """
+    INSERT INTO email_logs
+    (email_address, email_type, subject, status, error_message, appointment_id, sent_at)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+"""
+
+# Buffered log rows are force-flushed once this many accumulate, so a
+# crash mid-run loses at most one buffer's worth of log entries
+_LOG_BUFFER_LIMIT = 200
+
+# Applied to every connection the pool opens. WAL lets the follow-up
+# prepare-phase SELECTs overlap with send-phase status UPDATEs instead
+# of serializing on the rollback journal; journal_mode persists in the
+# file but the rest are per-connection and must be reapplied each open.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    # Wait instead of failing with SQLITE_BUSY when the pollers and
+    # the email senders briefly contend for the write lock
+    "PRAGMA busy_timeout=5000",
+)
+
 
 class DatabaseManager:
     def __init__(self, db_path: str = str(DATABASE_PATH)):
+        ensure_dirs()
         self.db_path = db_path
         self.backup_dir = DATABASE_BACKUP_PATH
         self.backup_dir.mkdir(exist_ok=True)
+        self._pool = queue.Queue(maxsize=POOL_SIZE)
+        self._pool_lock = threading.Lock()
+        self._pool_opened = 0
+        self._log_buffer = []
+        self._log_lock = threading.Lock()
         self.init_database()
 
     def init_database(self):
         """Initialize database with required tables."""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Customers table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS customers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fresha_customer_id TEXT UNIQUE NOT NULL,
-                    name TEXT NOT NULL,
-                    email TEXT NOT NULL,
-                    phone TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            # Appointments table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS appointments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fresha_appointment_id TEXT UNIQUE NOT NULL,
-                    customer_id INTEGER NOT NULL,
-                    service_type TEXT,
-                    appointment_date TIMESTAMP NOT NULL,
-                    completion_date TIMESTAMP,
-                    status TEXT DEFAULT 'pending',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(customer_id) REFERENCES customers(id)
-                )
-            """)
-
-            # Thank you emails table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS thank_you_emails (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    appointment_id INTEGER NOT NULL,
-                    customer_id INTEGER NOT NULL,
-                    email_address TEXT NOT NULL,
-                    scheduled_time TIMESTAMP,
-                    sent_time TIMESTAMP,
-                    status TEXT DEFAULT 'pending',
-                    retry_count INTEGER DEFAULT 0,
-                    error_message TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(appointment_id) REFERENCES appointments(id),
-                    FOREIGN KEY(customer_id) REFERENCES customers(id)
-                )
-            """)
-
-            # Follow-up emails table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS followup_emails (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    appointment_id INTEGER NOT NULL,
-                    customer_id INTEGER NOT NULL,
-                    email_address TEXT NOT NULL,
-                    scheduled_date TIMESTAMP NOT NULL,
-                    sent_time TIMESTAMP,
-                    status TEXT DEFAULT 'pending',
-                    retry_count INTEGER DEFAULT 0,
-                    error_message TEXT,
-                    feedback_token TEXT UNIQUE,
-                    feedback_provided BOOLEAN DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(appointment_id) REFERENCES appointments(id),
-                    FOREIGN KEY(customer_id) REFERENCES customers(id)
-                )
-            """)
-
-            # Email logs table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS email_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    email_address TEXT NOT NULL,
-                    email_type TEXT NOT NULL,
-                    subject TEXT,
-                    status TEXT,
-                    appointment_id INTEGER,
-                    sent_at TIMESTAMP,
-                    error_message TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            # Script execution logs table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS script_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    script_name TEXT NOT NULL,
-                    execution_date TIMESTAMP NOT NULL,
-                    status TEXT NOT NULL,
-                    emails_sent INTEGER DEFAULT 0,
-                    emails_skipped INTEGER DEFAULT 0,
-                    emails_failed INTEGER DEFAULT 0,
-                    error_message TEXT,
-                    execution_time_seconds FLOAT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            # Already-bootstrapped databases skip the DDL entirely; the
+            # IF NOT EXISTS checks alone still cost a parse/plan of
+            # every statement on each constructor call
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= _SCHEMA_VERSION:
+                return
+            conn.executescript(_SCHEMA_SQL)
+            logger.info("Database initialized successfully")
 
-            # Create indexes for better query performance
-            cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_customers_email ON customers(email)"
-            )
-            cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_appointments_customer ON appointments(customer_id)"
-            )
-            cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments(appointment_date)"
-            )
-            cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_thank_you_status ON thank_you_emails(status)"
-            )
-            cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_followup_status ON followup_emails(status)"
-            )
-            cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_email_logs_type ON email_logs(email_type)"
-            )
+    def _open_connection(self):
+        """Open a new tuned connection; callers own its lifetime."""
+        # cached_statements: sqlite3 keeps compiled statements per unique
+        # SQL text, so queries must stay string literals (no formatting)
+        # for the parse/plan step to be skipped on repeat executions
+        # check_same_thread=False: connections move between the pool and
+        # worker threads; access is serialized by the pool itself
+        conn = sqlite3.connect(
+            self.db_path, cached_statements=256, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
 
-            conn.commit()
-            logger.info("Database initialized successfully")
+    def _acquire_connection(self):
+        """Take a pooled connection, opening a new one while under the
+        pool size cap; blocks when the pool is exhausted."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if self._pool_opened < POOL_SIZE:
+                self._pool_opened += 1
+                return self._open_connection()
+        return self._pool.get()
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager lending a pooled database connection.
+
+        Connections are reused across calls so SQLite's page cache and
+        prepared-statement cache survive between queries.
+        """
+        conn = self._acquire_connection()
         try:
             yield conn
         finally:
-            conn.close()
+            # Drop any transaction a failed caller left open before the
+            # connection is lent out again
+            conn.rollback()
+            self._pool.put(conn)
+
+    def close(self):
+        """Close all pooled connections, updating planner stats first."""
+        self.flush_logs()
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.execute("PRAGMA optimize")
+                conn.close()
+                with self._pool_lock:
+                    self._pool_opened -= 1
+            except sqlite3.Error as e:
+                logger.error(f"Error closing pooled connection: {e}")
+
+    def maintenance(self):
+        """Periodic upkeep for the long-running deployment.
+
+        Truncates the WAL back to zero so it can't grow without bound
+        between checkpoints, and returns freed pages to the filesystem.
+        Meant to run about once a day from the scheduler.
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                conn.execute("PRAGMA incremental_vacuum")
+            logger.info("Database maintenance completed")
+        except sqlite3.Error as e:
+            logger.error(f"Error during database maintenance: {e}")
 
     def backup_database(self):
         """Create a backup of the database."""
@@ -158,10 +371,11 @@ class DatabaseManager:
                 self.backup_dir / f"nail_salon_automation_backup_{timestamp}.db"
             )
 
+            # VACUUM INTO writes a compacted copy in one sequential pass
+            # and folds the WAL in, so the backup is a single clean file
+            # (no -wal/-shm companions) and doubles as defragmentation
             with self.get_connection() as conn:
-                backup_conn = sqlite3.connect(str(backup_path))
-                conn.backup(backup_conn)
-                backup_conn.close()
+                conn.execute("VACUUM INTO ?", (str(backup_path),))
 
             logger.info(f"Database backed up to {backup_path}")
             return str(backup_path)
@@ -173,17 +387,28 @@ class DatabaseManager:
         """Add or update a customer."""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
+                # UPSERT instead of INSERT OR REPLACE: REPLACE deletes and
+                # re-inserts the row, which reassigns the id and orphans
+                # every appointment/email row pointing at the old one.
+                # DO UPDATE edits in place, so the primary key survives.
+                # RETURNING because lastrowid is unreliable on conflict.
+                cursor = conn.execute(
                     """
-                    INSERT OR REPLACE INTO customers 
-                    (fresha_customer_id, name, email, phone, updated_at)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    INSERT INTO customers
+                    (fresha_customer_id, name, email, phone)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(fresha_customer_id) DO UPDATE SET
+                        name = excluded.name,
+                        email = excluded.email,
+                        phone = excluded.phone,
+                        updated_at = CURRENT_TIMESTAMP
+                    RETURNING id
                     """,
                     (fresha_id, name, email, phone),
                 )
+                row = cursor.fetchone()
                 conn.commit()
-                return cursor.lastrowid
+                return row[0]
         except Exception as e:
             logger.error(f"Error adding customer: {e}")
             return None
@@ -210,17 +435,24 @@ class DatabaseManager:
         """Add appointment."""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
+                cursor = conn.execute(
                     """
-                    INSERT OR REPLACE INTO appointments
+                    INSERT INTO appointments
                     (fresha_appointment_id, customer_id, service_type, appointment_date, completion_date, status)
                     VALUES (?, ?, ?, ?, ?, 'completed')
+                    ON CONFLICT(fresha_appointment_id) DO UPDATE SET
+                        customer_id = excluded.customer_id,
+                        service_type = excluded.service_type,
+                        appointment_date = excluded.appointment_date,
+                        completion_date = excluded.completion_date,
+                        status = excluded.status
+                    RETURNING id
                     """,
                     (fresha_id, customer_id, service_type, appointment_date, completion_date),
                 )
+                row = cursor.fetchone()
                 conn.commit()
-                return cursor.lastrowid
+                return row[0]
         except Exception as e:
             logger.error(f"Error adding appointment: {e}")
             return None
@@ -231,14 +463,16 @@ class DatabaseManager:
         """Add thank you email record."""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    INSERT INTO thank_you_emails
-                    (appointment_id, customer_id, email_address, scheduled_time, status)
-                    VALUES (?, ?, ?, ?, 'pending')
-                    """,
-                    (appointment_id, customer_id, email_address, scheduled_time),
+                cursor = conn.execute(
+                    SQL_INSERT_THANK_YOU,
+                    (
+                        appointment_id,
+                        customer_id,
+                        email_address,
+                        # Stored as Unix seconds so the pending poll can do a
+                        # plain integer range seek on the composite index
+                        int(datetime.fromisoformat(scheduled_time).timestamp()),
+                    ),
                 )
                 conn.commit()
                 return cursor.lastrowid
@@ -246,60 +480,121 @@ class DatabaseManager:
             logger.error(f"Error adding thank you email: {e}")
             return None
 
+    def add_thank_you_emails_bulk(self, rows) -> int:
+        """Insert many thank-you email records in one transaction.
+
+        rows: list of (appointment_id, customer_id, email_address,
+        scheduled_time ISO string) tuples. One executemany + commit
+        instead of a transaction per record.
+        """
+        if not rows:
+            return 0
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(
+                    SQL_INSERT_THANK_YOU,
+                    [
+                        (
+                            appointment_id,
+                            customer_id,
+                            email_address,
+                            int(datetime.fromisoformat(scheduled_time).timestamp()),
+                        )
+                        for appointment_id, customer_id, email_address, scheduled_time in rows
+                    ],
+                )
+                conn.commit()
+                return len(rows)
+        except Exception as e:
+            logger.error(f"Error adding thank you emails in bulk: {e}")
+            return 0
+
     def get_pending_thank_you_emails(self):
         """Get all pending thank you emails for current time."""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT tye.* FROM thank_you_emails tye
-                    WHERE tye.status = 'pending'
-                    AND tye.retry_count < 3
-                    AND datetime(tye.scheduled_time) <= datetime('now')
-                    ORDER BY tye.created_at ASC
-                    """
+                cursor = conn.execute(
+                    SQL_GET_PENDING_THANK_YOU, (int(time.time()),)
                 )
                 return cursor.fetchall()
         except Exception as e:
             logger.error(f"Error fetching pending thank you emails: {e}")
             return []
 
+    def iter_pending_thank_you_emails(self):
+        """Yield pending thank you emails one row at a time.
+
+        Unlike get_pending_thank_you_emails this never materializes the
+        whole backlog; the lent connection goes back to the pool when
+        iteration finishes (or the generator is closed early).
+        """
+        with self.get_connection() as conn:
+            yield from conn.execute(SQL_GET_PENDING_THANK_YOU, (int(time.time()),))
+
+    def update_thank_you_email_statuses_bulk(self, rows):
+        """Update many thank you email statuses in one transaction.
+
+        rows: iterable of (status, error_message, email_id) tuples.
+        A single commit covers the whole batch, so only one fsync is
+        paid instead of one per email.
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(SQL_UPDATE_THANK_YOU_STATUS, rows)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error updating thank you email statuses: {e}")
+
     def update_thank_you_email_status(
         self, email_id: int, status: str, error_message: str = None
     ):
         """Update thank you email status."""
+        self.update_thank_you_email_statuses_bulk([(status, error_message, email_id)])
+
+    def bulk_mark_thank_you_sent(self, email_ids):
+        """Mark many thank-you emails sent with one UPDATE per 900 ids.
+
+        The homogeneous success case needs no per-row parameters beyond
+        the id, so a WHERE id IN (...) statement replaces executemany's
+        per-row dispatch. Ids are chunked under SQLite's default 999
+        bound-parameter limit.
+        """
+        if not email_ids:
+            return
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    UPDATE thank_you_emails
-                    SET status = ?, error_message = ?, sent_time = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                    """,
-                    (status, error_message, email_id),
-                )
+                for start in range(0, len(email_ids), 900):
+                    ids = email_ids[start : start + 900]
+                    placeholders = ",".join("?" * len(ids))
+                    conn.execute(
+                        "UPDATE thank_you_emails"
+                        " SET status = 'sent', error_message = NULL,"
+                        " sent_time = CURRENT_TIMESTAMP"
+                        f" WHERE id IN ({placeholders})",
+                        ids,
+                    )
                 conn.commit()
         except Exception as e:
-            logger.error(f"Error updating thank you email status: {e}")
+            logger.error(f"Error bulk-marking thank you emails sent: {e}")
 
-    def increment_thank_you_retry(self, email_id: int):
-        """Increment retry count for thank you email."""
+    def increment_thank_you_retries_bulk(self, email_ids):
+        """Increment retry counts for many thank you emails at once.
+
+        email_ids: iterable of email row ids. One try/except and one
+        commit cover the whole batch instead of being re-entered per row.
+        """
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    UPDATE thank_you_emails
-                    SET retry_count = retry_count + 1
-                    WHERE id = ?
-                    """,
-                    (email_id,),
+                conn.executemany(
+                    SQL_INCREMENT_THANK_YOU_RETRY, [(i,) for i in email_ids]
                 )
                 conn.commit()
         except Exception as e:
-            logger.error(f"Error incrementing retry count: {e}")
+            logger.error(f"Error incrementing retry counts: {e}")
+
+    def increment_thank_you_retry(self, email_id: int):
+        """Increment retry count for thank you email."""
+        self.increment_thank_you_retries_bulk([email_id])
 
     def add_followup_email(
         self, appointment_id: int, customer_id: int, email_address: str, scheduled_date: str, feedback_token: str
@@ -307,14 +602,15 @@ class DatabaseManager:
         """Add follow-up email record."""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    INSERT OR IGNORE INTO followup_emails
-                    (appointment_id, customer_id, email_address, scheduled_date, feedback_token, status)
-                    VALUES (?, ?, ?, ?, ?, 'pending')
-                    """,
-                    (appointment_id, customer_id, email_address, scheduled_date, feedback_token),
+                cursor = conn.execute(
+                    SQL_INSERT_FOLLOWUP,
+                    (
+                        appointment_id,
+                        customer_id,
+                        email_address,
+                        int(datetime.fromisoformat(scheduled_date).timestamp()),
+                        feedback_token,
+                    ),
                 )
                 conn.commit()
                 return cursor.lastrowid
@@ -326,56 +622,64 @@ class DatabaseManager:
         """Get all pending follow-up emails due for sending."""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT fye.* FROM followup_emails fye
-                    WHERE fye.status = 'pending'
-                    AND fye.retry_count < 3
-                    AND datetime(fye.scheduled_date) <= datetime('now')
-                    ORDER BY fye.created_at ASC
-                    """
+                cursor = conn.execute(
+                    SQL_GET_PENDING_FOLLOWUP, (int(time.time()),)
                 )
                 return cursor.fetchall()
         except Exception as e:
             logger.error(f"Error fetching pending follow-up emails: {e}")
             return []
 
+    def iter_pending_followup_emails(self):
+        """Yield pending follow-up emails one row at a time."""
+        with self.get_connection() as conn:
+            yield from conn.execute(SQL_GET_PENDING_FOLLOWUP, (int(time.time()),))
+
+    def update_followup_email_statuses_bulk(self, rows):
+        """Update many follow-up email statuses in one transaction.
+
+        rows: iterable of (status, error_message, email_id) tuples.
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(SQL_UPDATE_FOLLOWUP_STATUS, rows)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error updating follow-up email statuses: {e}")
+
     def update_followup_email_status(
         self, email_id: int, status: str, error_message: str = None
     ):
         """Update follow-up email status."""
+        self.update_followup_email_statuses_bulk([(status, error_message, email_id)])
+
+    def increment_followup_retries_bulk(self, email_ids):
+        """Increment retry counts for many follow-up emails at once."""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    UPDATE followup_emails
-                    SET status = ?, error_message = ?, sent_time = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                    """,
-                    (status, error_message, email_id),
+                conn.executemany(
+                    SQL_INCREMENT_FOLLOWUP_RETRY, [(i,) for i in email_ids]
                 )
                 conn.commit()
         except Exception as e:
-            logger.error(f"Error updating follow-up email status: {e}")
+            logger.error(f"Error incrementing retry counts: {e}")
 
     def increment_followup_retry(self, email_id: int):
         """Increment retry count for follow-up email."""
+        self.increment_followup_retries_bulk([email_id])
+
+    def log_emails_bulk(self, rows):
+        """Insert many email log rows in one transaction.
+
+        rows: iterable of (email_address, email_type, subject, status,
+        error_message, appointment_id) tuples.
+        """
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    UPDATE followup_emails
-                    SET retry_count = retry_count + 1
-                    WHERE id = ?
-                    """,
-                    (email_id,),
-                )
+                conn.executemany(SQL_INSERT_EMAIL_LOG, rows)
                 conn.commit()
         except Exception as e:
-            logger.error(f"Error incrementing retry count: {e}")
+            logger.error(f"Error logging emails: {e}")
 
     def log_email(
         self,
@@ -386,21 +690,29 @@ class DatabaseManager:
         error_message: str = None,
         appointment_id: int = None,
     ):
-        """Log email sending attempt."""
-        try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    INSERT INTO email_logs
-                    (email_address, email_type, subject, status, error_message, appointment_id, sent_at)
-                    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """,
-                    (email_address, email_type, subject, status, error_message, appointment_id),
-                )
-                conn.commit()
-        except Exception as e:
-            logger.error(f"Error logging email: {e}")
+        """Log email sending attempt.
+
+        Rows are buffered in memory and written in bulk: these logs are
+        append-only and never read during the send loop, so there is no
+        reason to pay a commit per email. Callers flush via flush_logs()
+        when the run ends; the buffer also self-flushes at
+        _LOG_BUFFER_LIMIT rows.
+        """
+        with self._log_lock:
+            self._log_buffer.append(
+                (email_address, email_type, subject, status, error_message, appointment_id)
+            )
+            if len(self._log_buffer) < _LOG_BUFFER_LIMIT:
+                return
+            rows, self._log_buffer = self._log_buffer, []
+        self.log_emails_bulk(rows)
+
+    def flush_logs(self):
+        """Write any buffered email log rows in one transaction."""
+        with self._log_lock:
+            rows, self._log_buffer = self._log_buffer, []
+        if rows:
+            self.log_emails_bulk(rows)
 
     def log_script_execution(
         self,
@@ -432,13 +744,8 @@ class DatabaseManager:
         """Check if follow-up already exists for appointment."""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT id FROM followup_emails
-                    WHERE customer_id = ? AND appointment_id = ?
-                    """,
-                    (customer_id, appointment_id),
+                cursor = conn.execute(
+                    SQL_CHECK_DUPLICATE_FOLLOWUP, (customer_id, appointment_id)
                 )
                 return cursor.fetchone() is not None
         except Exception as e:
@@ -448,21 +755,28 @@ class DatabaseManager:
     def get_script_stats(self, script_name: str, days: int = 7):
         """Get script execution stats for last N days."""
         try:
+            # Cutoff computed once in Python and bound as a plain string:
+            # the '-' || ? || ' days' concatenation made the right-hand
+            # side a per-query dynamic expression, and a bare comparison
+            # keeps execution_date usable by idx_script_logs_name_date.
+            # CURRENT_TIMESTAMP stores UTC, so compare against utcnow.
+            cutoff = (datetime.utcnow() - timedelta(days=days)).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
+                cursor = conn.execute(
                     """
-                    SELECT 
+                    SELECT
                         SUM(emails_sent) as total_sent,
                         SUM(emails_skipped) as total_skipped,
                         SUM(emails_failed) as total_failed,
                         COUNT(*) as executions,
                         AVG(execution_time_seconds) as avg_time
                     FROM script_logs
-                    WHERE script_name = ? 
-                    AND execution_date >= datetime('now', '-' || ? || ' days')
+                    WHERE script_name = ?
+                    AND execution_date >= ?
                     """,
-                    (script_name, days),
+                    (script_name, cutoff),
                 )
                 return cursor.fetchone()
         except Exception as e:
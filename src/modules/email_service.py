@@ -1,8 +1,11 @@
+import asyncio
 import logging
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import time
+from contextlib import contextmanager
+from email.message import EmailMessage
 from email.utils import formataddr
+from string import Template
 from src.config import (
     SMTP_SERVER,
     SMTP_PORT,
@@ -13,6 +16,95 @@ from src.config import (
 
 logger = logging.getLogger(__name__)
 
+# Idle seconds after which the held SMTP socket gets a NOOP probe before
+# reuse; Gmail/O365 silently drop connections idle much longer than this
+_SMTP_KEEPALIVE_SECONDS = 30
+
+# Concurrent SMTP sessions for async batch sends; providers rate-limit
+# well before this many parallel connections stops helping
+_ASYNC_SMTP_SESSIONS = 5
+
+# Email bodies compiled once at import as string.Template: per send only
+# the variable fields are substituted, instead of rebuilding the whole
+# blob through f-string formatting for every recipient
+_THANK_YOU_SUBJECT = "Thank You for Your Visit! 💅"
+
+_THANK_YOU_PLAIN_T = Template("""
+Dear $customer_name,
+
+Thank you for choosing us for your nails today! We hope you love your new look.
+
+If you have any questions or concerns, feel free to reach out anytime.
+
+Best regards,
+$salon_name
+""")
+
+_THANK_YOU_HTML_T = Template("""
+<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+        <h2 style="color: #d946a6;">Thank You for Your Visit!</h2>
+
+        <p>Dear $customer_name,</p>
+
+        <p>Thank you for choosing us for your nails today! We hope you love your new look. 💅</p>
+
+        <p>If you have any questions or concerns, feel free to reach out anytime.</p>
+
+        <br>
+        <p>Best regards,<br>
+        <strong>$salon_name</strong></p>
+    </div>
+</body>
+</html>
+""")
+
+_FOLLOWUP_SUBJECT = "How did your nails last? We'd love to know! 💖"
+
+_FOLLOWUP_PLAIN_T = Template("""
+Dear $customer_name,
+
+It's been a week since your last visit! We hope your nails are still looking fabulous.
+
+Could you let us know how long your manicure/pedicure lasted? Your feedback helps us improve our services.
+
+Feedback: $feedback_link
+
+Thank you for being a valued customer!
+
+Best regards,
+$salon_name
+""")
+
+_FOLLOWUP_HTML_T = Template("""
+<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+        <h2 style="color: #d946a6;">How did your nails last? 💖</h2>
+
+        <p>Dear $customer_name,</p>
+
+        <p>It's been a week since your last visit! We hope your nails are still looking fabulous.</p>
+
+        <p>Could you let us know how long your manicure/pedicure lasted? Your feedback helps us improve our services.</p>
+
+        <div style="text-align: center; margin: 30px 0;">
+            <a href="$feedback_link" style="background-color: #d946a6; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; display: inline-block;">
+                Share Your Feedback
+            </a>
+        </div>
+
+        <p>Thank you for being a valued customer!</p>
+
+        <br>
+        <p>Best regards,<br>
+        <strong>$salon_name</strong></p>
+    </div>
+</body>
+</html>
+""")
+
 
 class EmailService:
     def __init__(self):
@@ -21,6 +113,158 @@ class EmailService:
         self.sender_email = SENDER_EMAIL
         self.sender_password = SENDER_PASSWORD
         self.sender_name = SENDER_NAME
+        # Rendered once: every outgoing message carries the same sender
+        self._from_header = formataddr((self.sender_name, self.sender_email))
+        self._smtp = None
+        self._last_send = 0.0
+
+    def _connect(self):
+        """Open, upgrade, and authenticate a fresh SMTP connection."""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        server.starttls()
+        server.login(self.sender_email, self.sender_password)
+        return server
+
+    def open_session(self):
+        """Open a persistent SMTP connection reused by subsequent sends.
+
+        One TLS handshake and AUTH exchange then covers a whole batch
+        instead of being paid per email.
+        """
+        if self._smtp is None:
+            self._smtp = self._connect()
+            self._last_send = time.monotonic()
+
+    def close_session(self):
+        """Close the persistent SMTP connection, if any."""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPException:
+                pass
+            self._smtp = None
+
+    @contextmanager
+    def session(self):
+        """Context manager holding one SMTP connection across sends."""
+        self.open_session()
+        try:
+            yield self
+        finally:
+            self.close_session()
+
+    def _session_send(self, message):
+        """Send via the held connection, reviving it if the server
+        dropped the socket while we were idle."""
+        if time.monotonic() - self._last_send > _SMTP_KEEPALIVE_SECONDS:
+            try:
+                self._smtp.noop()
+            except (smtplib.SMTPException, OSError):
+                logger.info("SMTP session went stale, reconnecting")
+                self.close_session()
+                self._smtp = self._connect()
+        self._smtp.send_message(message)
+        self._last_send = time.monotonic()
+
+    def _build_message(
+        self, recipient_email, subject, html_body, plain_body=None
+    ):
+        """Assemble an EmailMessage; EmailMessage builds the multipart/
+        alternative structure without the legacy MIME object layers."""
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = self._from_header
+        message["To"] = recipient_email
+
+        # Attach plain text and HTML versions
+        if plain_body:
+            message.set_content(plain_body)
+            message.add_alternative(html_body, subtype="html")
+        else:
+            message.set_content(html_body, subtype="html")
+        return message
+
+    def send_messages(self, messages):
+        """Send prepared EmailMessage objects sequentially over one
+        persistent session.
+
+        Fallback counterpart to send_emails_async for deployments
+        without aiosmtplib. Returns (success, error_message) tuples in
+        input order.
+        """
+        results = []
+        with self.session():
+            for message in messages:
+                try:
+                    self._session_send(message)
+                    results.append((True, None))
+                except smtplib.SMTPException as e:
+                    error = f"SMTP error: {e}"
+                    logger.error(error)
+                    results.append((False, error))
+        return results
+
+    def send_emails_async(self, messages, max_sessions=_ASYNC_SMTP_SESSIONS):
+        """Send prepared EmailMessage objects concurrently.
+
+        A handful of authenticated SMTP sessions work through the batch
+        in parallel, so wall time is bounded by the slowest roundtrips
+        rather than their sum.
+
+        Returns:
+            list of (success: bool, error_message: str or None) tuples
+            in the same order as messages.
+        """
+        if not messages:
+            return []
+        return asyncio.run(self._send_all_async(list(messages), max_sessions))
+
+    async def _send_all_async(self, messages, max_sessions):
+        # Imported lazily: the sequential path must keep working on
+        # deployments that don't have aiosmtplib installed
+        import aiosmtplib
+
+        results = [None] * len(messages)
+        jobs = asyncio.Queue()
+        for item in enumerate(messages):
+            jobs.put_nowait(item)
+
+        async def worker():
+            smtp = aiosmtplib.SMTP(
+                hostname=self.smtp_server, port=self.smtp_port, start_tls=True
+            )
+            try:
+                await smtp.connect()
+                await smtp.login(self.sender_email, self.sender_password)
+            except aiosmtplib.errors.SMTPException as e:
+                # Couldn't establish a session: fail whatever jobs are
+                # still unclaimed so the batch always gets a result
+                error = f"SMTP error: {e}"
+                logger.error(error)
+                while not jobs.empty():
+                    index, _ = jobs.get_nowait()
+                    results[index] = (False, error)
+                return
+            try:
+                while not jobs.empty():
+                    index, message = jobs.get_nowait()
+                    try:
+                        await smtp.send_message(message)
+                        results[index] = (True, None)
+                    except aiosmtplib.errors.SMTPException as e:
+                        error = f"SMTP error: {e}"
+                        logger.error(error)
+                        results[index] = (False, error)
+            finally:
+                try:
+                    await smtp.quit()
+                except aiosmtplib.errors.SMTPException:
+                    pass
+
+        await asyncio.gather(
+            *(worker() for _ in range(min(max_sessions, len(messages))))
+        )
+        return results
 
     def send_email(
         self, recipient_email: str, subject: str, html_body: str, plain_body: str = None
@@ -37,22 +281,17 @@ class EmailService:
                 logger.warning(f"Email not sent: {error_msg}")
                 return False, error_msg
 
-            # Create message
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = formataddr((self.sender_name, self.sender_email))
-            message["To"] = recipient_email
-
-            # Attach plain text and HTML versions
-            if plain_body:
-                message.attach(MIMEText(plain_body, "plain"))
-            message.attach(MIMEText(html_body, "html"))
+            message = self._build_message(
+                recipient_email, subject, html_body, plain_body
+            )
 
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                server.send_message(message)
+            # Send email: reuse the session connection when one is open,
+            # otherwise fall back to a per-call connection
+            if self._smtp is not None:
+                self._session_send(message)
+            else:
+                with self._connect() as server:
+                    server.send_message(message)
 
             logger.info(f"Email sent successfully to {recipient_email}")
             return True, None
@@ -70,6 +309,25 @@ class EmailService:
             logger.error(error_msg)
             return False, error_msg
 
+    def build_thank_you_message(
+        self, recipient_email: str, customer_name: str, salon_name: str = None
+    ) -> EmailMessage:
+        """Assemble a thank-you EmailMessage without sending it.
+
+        Used by the batch senders, which build all messages up front
+        and hand them to send_emails_async.
+        """
+        if salon_name is None:
+            salon_name = self.sender_name
+
+        fields = {"customer_name": customer_name, "salon_name": salon_name}
+        return self._build_message(
+            recipient_email,
+            _THANK_YOU_SUBJECT,
+            _THANK_YOU_HTML_T.substitute(fields),
+            _THANK_YOU_PLAIN_T.substitute(fields),
+        )
+
     def send_thank_you_email(
         self, recipient_email: str, customer_name: str, salon_name: str = None
     ) -> tuple:
@@ -77,40 +335,13 @@ class EmailService:
         if salon_name is None:
             salon_name = self.sender_name
 
-        subject = "Thank You for Your Visit! 💅"
-        
-        plain_body = f"""
-Dear {customer_name},
-
-Thank you for choosing us for your nails today! We hope you love your new look.
-
-If you have any questions or concerns, feel free to reach out anytime.
-
-Best regards,
-{salon_name}
-"""
-
-        html_body = f"""
-<html>
-<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-    <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-        <h2 style="color: #d946a6;">Thank You for Your Visit!</h2>
-        
-        <p>Dear {customer_name},</p>
-        
-        <p>Thank you for choosing us for your nails today! We hope you love your new look. 💅</p>
-        
-        <p>If you have any questions or concerns, feel free to reach out anytime.</p>
-        
-        <br>
-        <p>Best regards,<br>
-        <strong>{salon_name}</strong></p>
-    </div>
-</body>
-</html>
-"""
-
-        return self.send_email(recipient_email, subject, html_body, plain_body)
+        fields = {"customer_name": customer_name, "salon_name": salon_name}
+        return self.send_email(
+            recipient_email,
+            _THANK_YOU_SUBJECT,
+            _THANK_YOU_HTML_T.substitute(fields),
+            _THANK_YOU_PLAIN_T.substitute(fields),
+        )
 
     def send_followup_email(
         self,
@@ -123,49 +354,14 @@ Best regards,
         if salon_name is None:
             salon_name = self.sender_name
 
-        subject = "How did your nails last? We'd love to know! 💖"
-        
-        plain_body = f"""
-Dear {customer_name},
-
-It's been a week since your last visit! We hope your nails are still looking fabulous.
-
-Could you let us know how long your manicure/pedicure lasted? Your feedback helps us improve our services.
-
-Feedback: {feedback_link}
-
-Thank you for being a valued customer!
-
-Best regards,
-{salon_name}
-"""
-
-        html_body = f"""
-<html>
-<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-    <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-        <h2 style="color: #d946a6;">How did your nails last? 💖</h2>
-        
-        <p>Dear {customer_name},</p>
-        
-        <p>It's been a week since your last visit! We hope your nails are still looking fabulous.</p>
-        
-        <p>Could you let us know how long your manicure/pedicure lasted? Your feedback helps us improve our services.</p>
-        
-        <div style="text-align: center; margin: 30px 0;">
-            <a href="{feedback_link}" style="background-color: #d946a6; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; display: inline-block;">
-                Share Your Feedback
-            </a>
-        </div>
-        
-        <p>Thank you for being a valued customer!</p>
-        
-        <br>
-        <p>Best regards,<br>
-        <strong>{salon_name}</strong></p>
-    </div>
-</body>
-</html>
-"""
-
-        return self.send_email(recipient_email, subject, html_body, plain_body)
+        fields = {
+            "customer_name": customer_name,
+            "salon_name": salon_name,
+            "feedback_link": feedback_link,
+        }
+        return self.send_email(
+            recipient_email,
+            _FOLLOWUP_SUBJECT,
+            _FOLLOWUP_HTML_T.substitute(fields),
+            _FOLLOWUP_PLAIN_T.substitute(fields),
+        )
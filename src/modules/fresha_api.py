@@ -1,7 +1,19 @@
+import json
 import logging
+import os
+import random
 import requests
+
+# Optional: orjson parses large list payloads several times faster than
+# the stdlib; fall back silently when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
 from src.config import (
     FRESHA_API_KEY,
     FRESHA_BUSINESS_ID,
@@ -13,6 +25,26 @@ import time
 
 logger = logging.getLogger(__name__)
 
+# Exponential backoff: attempt n sleeps a random amount up to
+# RETRY_DELAY * MULTIPLIER**n, capped here. Full jitter keeps retrying
+# clients from hammering the API in lockstep after an outage.
+_BACKOFF_MULTIPLIER = 2
+_MAX_BACKOFF_SECONDS = 60
+
+# Customer records change rarely relative to the scripts' run cadence,
+# so repeated per-ID lookups within this window are served from memory
+_CUSTOMER_CACHE_TTL = 600
+_CUSTOMER_CACHE_MAX = 4096
+# Business metadata is effectively static
+_BUSINESS_CACHE_TTL = 3600
+
+# Conditional-GET store: validators (ETag / Last-Modified) plus the body
+# they validate, per GET endpoint+querystring. A 304 from the server
+# costs headers only — no response body to transfer or parse. Persisted
+# across script runs, bounded by simple LRU.
+_ETAG_STORE_PATH = Path.home() / ".cache" / "fresha_etags.json"
+_ETAG_STORE_MAX = 64
+
 
 class FreshaAPIClient:
     def __init__(self):
@@ -23,113 +55,256 @@ class FreshaAPIClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        # One session for the client's lifetime: keep-alive reuses the
+        # TCP+TLS connection across calls instead of re-handshaking per
+        # request. Retries stay in _make_request (max_retries=0 here)
+        # so backoff behaviour is in one place.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=10, pool_maxsize=50, max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # customer_id -> (expires_at, record); checked before any
+        # network round trip in get_customer
+        self._customer_cache = {}
+        self._business_cache = None
+        # cache key -> [etag, last_modified, body]; most recently used
+        # entries at the end
+        self._etag_store = self._load_etag_store()
+
+    @staticmethod
+    def _load_etag_store() -> OrderedDict:
+        try:
+            # Cached bodies hold customer PII; tighten stores written
+            # before the file was created owner-only
+            os.chmod(_ETAG_STORE_PATH, 0o600)
+            with open(_ETAG_STORE_PATH) as f:
+                return OrderedDict(json.load(f))
+        except (OSError, ValueError):
+            return OrderedDict()
+
+    def _save_etag_store(self):
+        try:
+            _ETAG_STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            # The stored bodies include customer names/emails/phones, so
+            # the file is created readable by the owner only
+            fd = os.open(
+                _ETAG_STORE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+            )
+            with os.fdopen(fd, "w") as f:
+                json.dump(list(self._etag_store.items()), f)
+        except OSError as e:
+            logger.debug(f"Could not persist ETag store: {e}")
+
+    def _remember_validators(self, cache_key: str, response, body):
+        """Record a 200 response's validators (and body) for reuse."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        self._etag_store[cache_key] = [etag, last_modified, body]
+        self._etag_store.move_to_end(cache_key)
+        while len(self._etag_store) > _ETAG_STORE_MAX:
+            self._etag_store.popitem(last=False)
+        self._save_etag_store()
+
+    def close(self):
+        """Release the session's pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Optional[Dict]:
-        """Make API request with retry logic."""
+        """Make API request with retry logic.
+
+        Transient failures (timeouts, connection errors, 429/5xx) are
+        retried with exponential backoff and full jitter, honoring
+        Retry-After when the server sends one. Other 4xx responses are
+        client errors that a retry can't fix, so they fail immediately.
+
+        GETs are conditional when a previous response for the same
+        endpoint+querystring carried an ETag or Last-Modified: the
+        stored validators go out as If-None-Match/If-Modified-Since and
+        a 304 is answered from the stored body without transferring or
+        parsing a payload.
+        """
         url = f"{self.base_url}{endpoint}"
-        
+
+        cache_key = None
+        if method == "GET":
+            params = kwargs.get("params") or {}
+            cache_key = endpoint + "?" + "&".join(
+                f"{k}={params[k]}" for k in sorted(params)
+            )
+            cached = self._etag_store.get(cache_key)
+            if cached is not None:
+                headers = dict(kwargs.get("headers") or {})
+                etag, last_modified = cached[0], cached[1]
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+                kwargs["headers"] = headers
+
         for attempt in range(MAX_RETRIES):
+            sleep_for = None
             try:
-                response = requests.request(
-                    method=method, url=url, headers=self.headers, timeout=30, **kwargs
+                response = self.session.request(
+                    method=method, url=url, timeout=30, **kwargs
                 )
+                status = response.status_code
+                if status == 304 and cache_key is not None:
+                    entry = self._etag_store[cache_key]
+                    self._etag_store.move_to_end(cache_key)
+                    return entry[2]
+                if status in (429, 503):
+                    retry_after = response.headers.get("Retry-After")
+                    if retry_after is not None:
+                        try:
+                            sleep_for = float(retry_after)
+                        except ValueError:
+                            pass
+                elif 400 <= status < 500:
+                    logger.error(
+                        f"API request failed with client error {status}: {url}"
+                    )
+                    return None
                 response.raise_for_status()
-                return response.json()
+                # orjson.JSONDecodeError subclasses ValueError, so the
+                # handler below covers both decode paths
+                if orjson is not None:
+                    body = orjson.loads(response.content)
+                else:
+                    body = response.json()
+                if cache_key is not None:
+                    self._remember_validators(cache_key, response, body)
+                return body
             except requests.exceptions.RequestException as e:
                 logger.warning(
                     f"API request failed (attempt {attempt + 1}/{MAX_RETRIES}): {e}"
                 )
-                if attempt < MAX_RETRIES - 1:
-                    time.sleep(RETRY_DELAY)
-                else:
-                    logger.error(f"API request failed after {MAX_RETRIES} attempts")
-                    return None
             except ValueError as e:
                 logger.error(f"Invalid JSON response: {e}")
                 return None
 
-    def get_today_appointments(self) -> List[Dict]:
-        """Get all completed appointments for today."""
-        try:
-            today = datetime.now().strftime("%Y-%m-%d")
-            
-            endpoint = f"/businesses/{self.business_id}/appointments"
-            params = {
-                "filter[start_date_min]": f"{today}T00:00:00",
-                "filter[start_date_max]": f"{today}T23:59:59",
-                "filter[status]": "completed",
-                "limit": 100,
-            }
+            if attempt >= MAX_RETRIES - 1:
+                logger.error(f"API request failed after {MAX_RETRIES} attempts")
+                return None
+            if sleep_for is None:
+                cap = min(
+                    _MAX_BACKOFF_SECONDS,
+                    RETRY_DELAY * _BACKOFF_MULTIPLIER**attempt,
+                )
+                sleep_for = random.uniform(0, cap)
+            time.sleep(sleep_for)
+
+    def _iter_pages(self, endpoint: str, params: Dict) -> Iterator[Dict]:
+        """Yield records across all pages of a listing endpoint.
 
+        Follows the API's cursor until exhausted, so callers see every
+        record (the old single-request form silently stopped at the
+        first page) while only one page is held in memory at a time.
+        """
+        params = dict(params)
+        while True:
             response = self._make_request("GET", endpoint, params=params)
-            if response and "data" in response:
-                return response["data"]
-            return []
-        except Exception as e:
-            logger.error(f"Error fetching today's appointments: {e}")
-            return []
+            if not response or "data" not in response:
+                return
+            yield from response["data"]
+            cursor = response.get("meta", {}).get("next_cursor")
+            if not cursor:
+                return
+            params["page[cursor]"] = cursor
+
+    def iter_today_appointments(self) -> Iterator[Dict]:
+        """Stream all completed appointments for today."""
+        today = datetime.now().date().isoformat()
+        return self.iter_appointments_for_date(today)
+
+    def iter_appointments_for_date(self, date: str) -> Iterator[Dict]:
+        """Stream completed appointments for a specific date."""
+        endpoint = f"/businesses/{self.business_id}/appointments"
+        params = {
+            "filter[start_date_min]": f"{date}T00:00:00",
+            "filter[start_date_max]": f"{date}T23:59:59",
+            "filter[status]": "completed",
+            "limit": 100,
+        }
+        return self._iter_pages(endpoint, params)
+
+    def get_today_appointments(self) -> List[Dict]:
+        """Get all completed appointments for today."""
+        return list(self.iter_today_appointments())
 
     def get_appointments_for_date(self, date: str) -> List[Dict]:
         """Get appointments for a specific date."""
-        try:
-            endpoint = f"/businesses/{self.business_id}/appointments"
-            params = {
-                "filter[start_date_min]": f"{date}T00:00:00",
-                "filter[start_date_max]": f"{date}T23:59:59",
-                "filter[status]": "completed",
-                "limit": 100,
-            }
-
-            response = self._make_request("GET", endpoint, params=params)
-            if response and "data" in response:
-                return response["data"]
-            return []
-        except Exception as e:
-            logger.error(f"Error fetching appointments for {date}: {e}")
-            return []
+        return list(self.iter_appointments_for_date(date))
 
     def get_customer(self, customer_id: str) -> Optional[Dict]:
-        """Get customer details."""
-        try:
-            endpoint = f"/businesses/{self.business_id}/customers/{customer_id}"
-            return self._make_request("GET", endpoint)
-        except Exception as e:
-            logger.error(f"Error fetching customer {customer_id}: {e}")
-            return None
+        """Get customer details, cached for _CUSTOMER_CACHE_TTL seconds."""
+        cached = self._customer_cache.get(customer_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        endpoint = f"/businesses/{self.business_id}/customers/{customer_id}"
+        customer = self._make_request("GET", endpoint)
+        if customer:
+            # Crude size bound: dropping everything at the cap is
+            # fine for a cache refilled within one batch run
+            if len(self._customer_cache) >= _CUSTOMER_CACHE_MAX:
+                self._customer_cache.clear()
+            self._customer_cache[customer_id] = (
+                time.monotonic() + _CUSTOMER_CACHE_TTL,
+                customer,
+            )
+        return customer
+
+    def invalidate(self, customer_id: str):
+        """Drop a customer from the cache after an external update."""
+        self._customer_cache.pop(customer_id, None)
+
+    def iter_customers(self, page_size: int = 100) -> Iterator[Dict]:
+        """Stream all customers page by page."""
+        endpoint = f"/businesses/{self.business_id}/customers"
+        return self._iter_pages(endpoint, {"limit": page_size})
 
     def get_customers(self, limit: int = 100) -> List[Dict]:
         """Get list of customers."""
-        try:
-            endpoint = f"/businesses/{self.business_id}/customers"
-            params = {"limit": limit}
-            
-            response = self._make_request("GET", endpoint, params=params)
-            if response and "data" in response:
-                return response["data"]
-            return []
-        except Exception as e:
-            logger.error(f"Error fetching customers: {e}")
-            return []
+        endpoint = f"/businesses/{self.business_id}/customers"
+        params = {"limit": limit}
+
+        response = self._make_request("GET", endpoint, params=params)
+        if response and "data" in response:
+            return response["data"]
+        return []
 
     def get_appointment_by_id(self, appointment_id: str) -> Optional[Dict]:
         """Get specific appointment details."""
-        try:
-            endpoint = f"/businesses/{self.business_id}/appointments/{appointment_id}"
-            return self._make_request("GET", endpoint)
-        except Exception as e:
-            logger.error(f"Error fetching appointment {appointment_id}: {e}")
-            return None
+        endpoint = f"/businesses/{self.business_id}/appointments/{appointment_id}"
+        return self._make_request("GET", endpoint)
 
     def verify_connection(self) -> bool:
         """Verify API connection and credentials."""
-        try:
-            endpoint = f"/businesses/{self.business_id}"
-            response = self._make_request("GET", endpoint)
-            if response:
-                logger.info("Fresha API connection verified")
-                return True
-            logger.error("Failed to verify Fresha API connection")
-            return False
-        except Exception as e:
-            logger.error(f"Error verifying API connection: {e}")
-            return False
+        if (
+            self._business_cache is not None
+            and self._business_cache[0] > time.monotonic()
+        ):
+            return True
+
+        endpoint = f"/businesses/{self.business_id}"
+        response = self._make_request("GET", endpoint)
+        if response:
+            self._business_cache = (
+                time.monotonic() + _BUSINESS_CACHE_TTL,
+                response,
+            )
+            logger.info("Fresha API connection verified")
+            return True
+        logger.error("Failed to verify Fresha API connection")
+        return False
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from src.config import (
+    FRESHA_API_KEY,
+    FRESHA_BUSINESS_ID,
+    FRESHA_API_BASE_URL,
+    MAX_RETRIES,
+    RETRY_DELAY,
+)
+
+# aiohttp is a declared dependency (pinned in requirements.txt), unlike
+# the purely optional liburing. The import is still guarded so that
+# minimal deployments which skip the async client can import the
+# modules package; constructing the client then fails with a clear
+# message instead of an import-time crash.
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Optional: same fast-decode fallback as the sync client
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Concurrent in-flight requests per bulk call; the connector pools the
+# underlying TLS connections so this bounds load on the API, not sockets
+_BULK_CONCURRENCY = 20
+
+
+class AsyncFreshaAPIClient:
+    """Async counterpart to FreshaAPIClient for bulk per-ID lookups.
+
+    Fetching N customers or appointments one at a time costs N serial
+    round trips; here they fan out over a bounded number of concurrent
+    requests on pooled connections, so wall time is ~N/concurrency
+    round trips. Use as an async context manager:
+
+        async with AsyncFreshaAPIClient() as client:
+            customers = await client.get_customers_bulk(ids)
+    """
+
+    def __init__(self):
+        if aiohttp is None:
+            raise ImportError(
+                "aiohttp is required for AsyncFreshaAPIClient; "
+                "install it with: pip install -r requirements.txt"
+            )
+        self.api_key = FRESHA_API_KEY
+        self.business_id = FRESHA_BUSINESS_ID
+        self.base_url = FRESHA_API_BASE_URL
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        self._session = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit=50, limit_per_host=50),
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Release the pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get(self, endpoint: str, **kwargs) -> Optional[Dict]:
+        """Make a GET request with retry logic."""
+        url = f"{self.base_url}{endpoint}"
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                async with self._session.get(url, **kwargs) as response:
+                    response.raise_for_status()
+                    if orjson is not None:
+                        return orjson.loads(await response.read())
+                    return await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(
+                    f"API request failed (attempt {attempt + 1}/{MAX_RETRIES}): {e}"
+                )
+                if attempt < MAX_RETRIES - 1:
+                    await asyncio.sleep(RETRY_DELAY)
+                else:
+                    logger.error(f"API request failed after {MAX_RETRIES} attempts")
+                    return None
+
+    async def get_customers_bulk(self, customer_ids: List[str]) -> List[Optional[Dict]]:
+        """Fetch many customers concurrently; results match input order."""
+        sem = asyncio.Semaphore(_BULK_CONCURRENCY)
+
+        async def one(customer_id):
+            async with sem:
+                return await self._get(
+                    f"/businesses/{self.business_id}/customers/{customer_id}"
+                )
+
+        return await asyncio.gather(*(one(i) for i in customer_ids))
+
+    async def get_appointments_bulk(
+        self, appointment_ids: List[str]
+    ) -> List[Optional[Dict]]:
+        """Fetch many appointments concurrently; results match input order."""
+        sem = asyncio.Semaphore(_BULK_CONCURRENCY)
+
+        async def one(appointment_id):
+            async with sem:
+                return await self._get(
+                    f"/businesses/{self.business_id}/appointments/{appointment_id}"
+                )
+
+        return await asyncio.gather(*(one(i) for i in appointment_ids))
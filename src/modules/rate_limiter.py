@@ -0,0 +1,39 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Token-bucket limiter that paces work by actual throughput.
+
+    Tokens accrue continuously at `rate` per second up to `capacity`;
+    acquire(n) consumes n tokens, sleeping only for whatever deficit
+    remains. Unlike a fixed inter-batch sleep, a batch that finished
+    slowly has already "paid" its tokens and proceeds immediately,
+    while a fast burst is held back just long enough to stay within
+    the provider's allowed rate.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill_locked(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def acquire(self, n: int = 1):
+        """Block until n tokens are available, then consume them."""
+        while True:
+            with self._lock:
+                self._refill_locked()
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                deficit = (n - self._tokens) / self.rate
+            time.sleep(deficit)
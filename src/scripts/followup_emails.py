@@ -6,9 +6,11 @@ Prevents duplicate emails using unique tokens.
 """
 
 import logging
+import secrets
+import sqlite3
 import sys
 import time
-import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -22,23 +24,75 @@ from src.config import (
     LOG_FORMAT,
     BATCH_SIZE,
     EMAIL_DELAY_BETWEEN_BATCH,
+    EMAIL_SMTP_CONCURRENCY,
+    ensure_dirs,
 )
 from src.database.database_manager import DatabaseManager
 from src.modules.email_service import EmailService
 from src.modules.alert_service import AlertService
+from src.modules.uring_log_handler import make_log_handler
 
 # Setup logging
+ensure_dirs()
 log_file = LOG_DIR / "followup_script.log"
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL),
     format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler(log_file),
+        make_log_handler(log_file),
         logging.StreamHandler(),
     ],
 )
 logger = logging.getLogger(__name__)
 
+# Adaptive batch pacing: on throttle signals the batch halves (down to
+# the floor) and the inter-batch sleep doubles (up to the ceiling); on
+# clean batches both recover toward their configured values
+_MIN_BATCH = 8
+_MAX_DELAY = 60
+_MIN_DELAY = 0.5
+# Substrings that mark a provider throttle response in SMTP errors
+_THROTTLE_MARKERS = ("rate limit", "ratelimit", "429", "too many")
+
+# Constant per-email strings, hoisted out of the send loop
+_FOLLOWUP_SUBJECT = "How did your nails last? We'd love to know!"
+_FOLLOWUP_TYPE = "followup"
+
+# Completed appointments in the date window that don't have a follow-up
+# yet. The LEFT JOIN anti-join resolves each candidate with one probe
+# of idx_followup_email_appt, where the old NOT IN subquery re-scanned
+# followup_emails per row. Comparing the bare appointment_date column
+# (no date() wrapper) keeps the range seekable via idx_appt_status_date.
+# Module-level so the identical SQL string hits the connection's
+# statement cache on every run instead of being re-parsed.
+_ELIGIBLE_SQL = """
+    SELECT DISTINCT a.id, a.fresha_appointment_id, a.customer_id, a.appointment_date,
+           c.name, c.email
+    FROM appointments a
+    JOIN customers c ON a.customer_id = c.id
+    LEFT JOIN followup_emails f ON f.appointment_id = a.id
+    WHERE a.status = 'completed'
+    AND a.appointment_date >= ?
+    AND a.appointment_date < ?
+    AND f.appointment_id IS NULL
+    ORDER BY a.appointment_date DESC
+"""
+
+# Rows pulled from the eligibility cursor per fetchmany round trip
+_FETCH_CHUNK = 500
+# Stay under SQLite's default 999 bound-parameter limit when building
+# IN (...) lists
+_SQLITE_MAX_PARAMS = 900
+
+
+def _iter_row_chunks(cursor):
+    """Yield cursor results in _FETCH_CHUNK-sized lists until exhausted."""
+    while True:
+        chunk = cursor.fetchmany(_FETCH_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
 
 class FollowUpEmailAutomation:
     def __init__(self, base_url: str = "https://your-salon.com/feedback"):
@@ -46,6 +100,13 @@ class FollowUpEmailAutomation:
         self.email_service = EmailService()
         self.alert_service = AlertService()
         self.base_url = base_url
+        self.reset()
+
+    def reset(self):
+        """Clear per-run counters so the instance can be reused."""
+        # Everything up to the token is constant across a run, so the
+        # per-email link build is a single C-level concat
+        self._link_prefix = self.base_url + "?token="
         self.stats = {
             "emails_sent": 0,
             "emails_skipped": 0,
@@ -61,10 +122,22 @@ class FollowUpEmailAutomation:
         )
         
         try:
-            # Calculate date range
+            # Calculate date range: a half-open window of ±1 day around
+            # the target, computed in Python so the SQL compares the raw
+            # stored timestamps (ISO strings sort lexicographically)
+            # date.isoformat() is C-implemented and skips strftime's
+            # locale machinery; the output format is identical
             today = datetime.now()
             target_date = today - timedelta(days=FOLLOWUP_DAYS)
-            target_date_str = target_date.strftime("%Y-%m-%d")
+            target_date_str = target_date.date().isoformat()
+            window_low = (
+                (target_date - timedelta(days=1)).date().isoformat()
+                + " 00:00:00"
+            )
+            window_high = (
+                (target_date + timedelta(days=2)).date().isoformat()
+                + " 00:00:00"
+            )
 
             # Get appointments from 7 days ago (with some tolerance)
             # In real implementation, query database for appointments from that date
@@ -72,92 +145,111 @@ class FollowUpEmailAutomation:
                 f"Looking for appointments from around {target_date_str}"
             )
 
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                # Get completed appointments from around 7 days ago that don't have follow-up yet
-                cursor.execute(
-                    """
-                    SELECT DISTINCT a.id, a.fresha_appointment_id, a.customer_id, a.appointment_date,
-                           c.name, c.email
-                    FROM appointments a
-                    JOIN customers c ON a.customer_id = c.id
-                    WHERE a.status = 'completed'
-                    AND date(a.appointment_date) >= date(?, '-1 day')
-                    AND date(a.appointment_date) <= date(?, '+1 day')
-                    AND a.id NOT IN (
-                        SELECT appointment_id FROM followup_emails
-                    )
-                    ORDER BY a.appointment_date DESC
-                    """,
-                    (target_date_str, target_date_str),
-                )
-                appointments = cursor.fetchall()
-
-            logger.info(f"Found {len(appointments)} appointments eligible for follow-up")
-
-            # Process each appointment
+            # Stream the candidates in fetchmany chunks instead of
+            # materializing the whole result with fetchall: memory stays
+            # bounded by _FETCH_CHUNK regardless of how many
+            # appointments qualify, and the first inserts land while
+            # later rows are still being fetched. The connection block
+            # encloses the loop so the cursor stays open until
+            # exhausted; the bulk insert takes a second pooled
+            # connection for its own transaction.
+            eligible_count = 0
             followup_count = 0
-            for appointment in appointments:
-                if self._create_followup_email(appointment):
-                    followup_count += 1
+            with self.db_manager.get_connection() as conn:
+                cursor = conn.execute(_ELIGIBLE_SQL, (window_low, window_high))
+                for chunk in _iter_row_chunks(cursor):
+                    eligible_count += len(chunk)
+                    followup_count += self._create_followup_emails_bulk(chunk)
 
+            logger.info(
+                f"Found {eligible_count} appointments eligible for follow-up"
+            )
             logger.info(f"Created {followup_count} follow-up email records")
             return True
 
-        except Exception as e:
+        except sqlite3.Error as e:
             error_msg = f"Error preparing follow-up emails: {str(e)}"
             logger.error(error_msg)
             self.stats["errors"].append(error_msg)
             return False
 
-    def _create_followup_email(self, appointment) -> bool:
-        """Create follow-up email record for appointment."""
-        try:
-            appointment_dict = dict(appointment)
-            appointment_id = appointment_dict["id"]
-            customer_id = appointment_dict["customer_id"]
-            email_address = appointment_dict["email"]
-            customer_name = appointment_dict["name"]
-
-            # Check for duplicate
-            if self.db_manager.check_duplicate_followup(customer_id, appointment_id):
+    def _create_followup_email_rows(self, appointments, existing):
+        """Build insert rows for appointments without an existing follow-up."""
+        # Scheduled for now; stored as Unix seconds like the DB schema
+        scheduled_epoch = int(time.time())
+        rows = []
+        # Positional unpack in _ELIGIBLE_SQL column order: named Row
+        # lookups hash the column name per access, which adds up over
+        # thousands of rows for no gain when the projection is static
+        for appointment_id, _, customer_id, _, _, email_address in appointments:
+            if (customer_id, appointment_id) in existing:
                 logger.debug(
                     f"Follow-up already exists for appointment {appointment_id}"
                 )
                 self.stats["duplicates_prevented"] += 1
-                return False
+                continue
+            rows.append(
+                (
+                    appointment_id,
+                    customer_id,
+                    email_address,
+                    scheduled_epoch,
+                    # 128 bits from the CSPRNG, base64url — shorter in
+                    # the feedback URL than a hyphenated uuid4 and not
+                    # guessable from other tokens
+                    secrets.token_urlsafe(16),
+                )
+            )
+        return rows
 
-            # Generate unique feedback token
-            feedback_token = str(uuid.uuid4())
+    def _create_followup_emails_bulk(self, appointments) -> int:
+        """Create follow-up email records in one transaction.
 
-            # Schedule follow-up for today (or now, depending on logic)
-            scheduled_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        The per-appointment loop of check_duplicate_followup SELECT +
+        add_followup_email INSERT paid two round trips and a commit per
+        appointment; here the existing (customer, appointment) pairs
+        are prefetched into a set and the new rows land in a single
+        executemany.
+        """
+        if not appointments:
+            return 0
 
-            # Add follow-up email record
-            email_id = self.db_manager.add_followup_email(
-                appointment_id=appointment_id,
-                customer_id=customer_id,
-                email_address=email_address,
-                scheduled_date=scheduled_date,
-                feedback_token=feedback_token,
-            )
+        try:
+            with self.db_manager.get_connection() as conn:
+                appointment_ids = [a[0] for a in appointments]
+                # One SELECT per _SQLITE_MAX_PARAMS ids: still O(1)
+                # round trips for typical batches, without tripping
+                # SQLite's bound-parameter limit on very large ones
+                existing = set()
+                for start in range(0, len(appointment_ids), _SQLITE_MAX_PARAMS):
+                    ids = appointment_ids[start : start + _SQLITE_MAX_PARAMS]
+                    placeholders = ",".join("?" * len(ids))
+                    existing.update(
+                        (row[0], row[1])
+                        for row in conn.execute(
+                            "SELECT customer_id, appointment_id FROM followup_emails"
+                            f" WHERE appointment_id IN ({placeholders})",
+                            ids,
+                        )
+                    )
 
-            if email_id:
-                logger.info(
-                    f"Created follow-up email for {customer_name} ({email_address})"
-                )
-                return True
-            else:
-                logger.error(
-                    f"Failed to create follow-up email for {customer_name}"
-                )
-                self.stats["emails_failed"] += 1
-                return False
+                rows = self._create_followup_email_rows(appointments, existing)
+                if rows:
+                    conn.executemany(
+                        """
+                        INSERT OR IGNORE INTO followup_emails
+                        (appointment_id, customer_id, email_address, scheduled_date, feedback_token, status)
+                        VALUES (?, ?, ?, ?, ?, 'pending')
+                        """,
+                        rows,
+                    )
+                    conn.commit()
+                return len(rows)
 
-        except Exception as e:
-            logger.error(f"Error creating follow-up email: {e}")
+        except (sqlite3.Error, KeyError) as e:
+            logger.error(f"Error creating follow-up emails: {e}")
             self.stats["errors"].append(str(e))
-            return False
+            return 0
 
     def send_pending_followups(self):
         """Send all pending follow-up emails that are due."""
@@ -171,64 +263,115 @@ class FollowUpEmailAutomation:
                 logger.info("No pending follow-up emails to send")
                 return True
 
-            # Process in batches
-            for i in range(0, len(pending_emails), BATCH_SIZE):
-                batch = pending_emails[i : i + BATCH_SIZE]
-                self._send_followup_batch(batch)
-                
-                # Delay between batches
-                if i + BATCH_SIZE < len(pending_emails):
-                    logger.info(
-                        f"Waiting {EMAIL_DELAY_BETWEEN_BATCH}s before next batch..."
+            # Process in batches, adapting to provider back-pressure:
+            # a fixed size/delay either wastes time when the provider
+            # is fast or hammers it when it's rate-limiting
+            effective_batch = BATCH_SIZE
+            delay = EMAIL_DELAY_BETWEEN_BATCH
+            i = 0
+            while i < len(pending_emails):
+                batch = pending_emails[i : i + effective_batch]
+                throttled = self._send_followup_batch(batch)
+                i += len(batch)
+
+                if i >= len(pending_emails):
+                    break
+
+                if throttled:
+                    effective_batch = max(_MIN_BATCH, effective_batch // 2)
+                    delay = min(_MAX_DELAY, delay * 2)
+                    logger.warning(
+                        f"Provider throttling detected; batch size now "
+                        f"{effective_batch}, delay {delay}s"
                     )
-                    time.sleep(EMAIL_DELAY_BETWEEN_BATCH)
+                else:
+                    effective_batch = min(BATCH_SIZE, effective_batch * 2)
+                    delay = max(_MIN_DELAY, delay / 2)
+
+                logger.info(f"Waiting {delay}s before next batch...")
+                time.sleep(delay)
 
             return True
 
-        except Exception as e:
+        except sqlite3.Error as e:
             error_msg = f"Error sending pending follow-up emails: {str(e)}"
             logger.error(error_msg)
             self.stats["errors"].append(error_msg)
             return False
 
+    def _send_one_followup(self, email_address, feedback_token) -> tuple:
+        """Send a single follow-up email; runs on a worker thread.
+
+        Only the SMTP roundtrip happens here — no DB or stats access.
+        """
+        # Build feedback link
+        feedback_link = self._link_prefix + feedback_token
+
+        # Get customer info (basic - could be enhanced with DB lookup)
+        customer_name = "Valued Customer"
+
+        return self.email_service.send_followup_email(
+            recipient_email=email_address,
+            customer_name=customer_name,
+            feedback_link=feedback_link,
+        )
+
     def _send_followup_batch(self, batch: list):
-        """Send a batch of follow-up emails."""
-        for email_record in batch:
-            try:
-                email_record_dict = dict(email_record)
-                email_id = email_record_dict["id"]
-                customer_email = email_record_dict["email_address"]
-                feedback_token = email_record_dict["feedback_token"]
-                
-                # Build feedback link
-                feedback_link = f"{self.base_url}?token={feedback_token}"
-
-                # Get customer info (basic - could be enhanced with DB lookup)
-                customer_name = "Valued Customer"
-
-                # Send email
-                success, error = self.email_service.send_followup_email(
-                    recipient_email=customer_email,
-                    customer_name=customer_name,
-                    feedback_link=feedback_link,
+        """Send a batch of follow-up emails.
+
+        Sends within the batch are independent, so they fan out over a
+        thread pool: batch wall time is bounded by the slowest SMTP
+        roundtrip instead of their sum. DB updates and stats stay on
+        this coordinating thread, consumed as sends complete, so no
+        locking is needed around them. The inter-batch delay in the
+        caller still paces the provider.
+
+        Returns:
+            bool: True when any failure looked like provider
+            throttling, so the caller can back off.
+        """
+        throttled = False
+        # Outcomes accumulate here and hit the database once per batch
+        # via the executemany bulk methods (two commits per batch
+        # instead of two per email); log_email is already buffered
+        status_updates = []  # (status, error_message, email_id)
+        retry_ids = []
+        with ThreadPoolExecutor(max_workers=EMAIL_SMTP_CONCURRENCY) as executor:
+            # Unpack each Row once, positionally, in the pending-query
+            # column order — no dict(Row) materialization per record
+            futures = {}
+            for row in batch:
+                email_id, _, _, email_address, feedback_token, retry_count = row
+                future = executor.submit(
+                    self._send_one_followup, email_address, feedback_token
                 )
+                futures[future] = (email_id, email_address, retry_count)
+            for future in as_completed(futures):
+                email_id, customer_email, retry_count = futures[future]
+                try:
+                    success, error = future.result()
+                except (sqlite3.Error, KeyError) as e:
+                    error_msg = f"Error sending follow-up email in batch: {str(e)}"
+                    logger.error(error_msg)
+                    self.stats["errors"].append(error_msg)
+                    continue
 
                 if success:
-                    self.db_manager.update_followup_email_status(
-                        email_id=email_id, status="sent"
-                    )
+                    status_updates.append(("sent", None, email_id))
                     self.db_manager.log_email(
                         email_address=customer_email,
-                        email_type="followup",
-                        subject="How did your nails last? We'd love to know!",
+                        email_type=_FOLLOWUP_TYPE,
+                        subject=_FOLLOWUP_SUBJECT,
                         status="sent",
                     )
                     self.stats["emails_sent"] += 1
                     logger.info(f"Follow-up email sent to {customer_email}")
                 else:
-                    # Increment retry count
-                    self.db_manager.increment_followup_retry(email_id)
-                    retry_count = email_record_dict.get("retry_count", 0)
+                    retry_ids.append(email_id)
+                    if error and any(
+                        marker in error.lower() for marker in _THROTTLE_MARKERS
+                    ):
+                        throttled = True
 
                     if retry_count < 2:
                         logger.warning(
@@ -236,9 +379,7 @@ class FollowUpEmailAutomation:
                         )
                         self.stats["emails_skipped"] += 1
                     else:
-                        self.db_manager.update_followup_email_status(
-                            email_id=email_id, status="failed", error_message=error
-                        )
+                        status_updates.append(("failed", error, email_id))
                         self.stats["emails_failed"] += 1
                         logger.error(
                             f"Failed to send follow-up email to {customer_email} after retries: {error}"
@@ -246,22 +387,25 @@ class FollowUpEmailAutomation:
 
                     self.db_manager.log_email(
                         email_address=customer_email,
-                        email_type="followup",
-                        subject="How did your nails last? We'd love to know!",
+                        email_type=_FOLLOWUP_TYPE,
+                        subject=_FOLLOWUP_SUBJECT,
                         status="failed",
                         error_message=error,
                     )
 
-            except Exception as e:
-                error_msg = f"Error sending follow-up email in batch: {str(e)}"
-                logger.error(error_msg)
-                self.stats["errors"].append(error_msg)
+        if retry_ids:
+            self.db_manager.increment_followup_retries_bulk(retry_ids)
+        if status_updates:
+            self.db_manager.update_followup_email_statuses_bulk(status_updates)
+
+        return throttled
 
     def run(self, base_url: str = None):
         """Main execution method."""
         if base_url:
             self.base_url = base_url
 
+        self.reset()
         start_time = time.time()
         logger.info("=" * 60)
         logger.info("Starting Follow-Up Email Automation Script")
@@ -327,6 +471,10 @@ class FollowUpEmailAutomation:
             )
             return False
 
+        finally:
+            # Persist buffered email log rows even on a fatal error
+            self.db_manager.flush_logs()
+
 
 def main():
     """Entry point."""
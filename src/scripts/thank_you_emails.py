@@ -5,10 +5,15 @@ Sends thank-you emails at scheduled times (12pm and 7pm) for completed appointme
 Includes comprehensive logging and error handling.
 """
 
+import atexit
 import logging
+import queue
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 from pathlib import Path
 
 # Add src to path
@@ -22,24 +27,54 @@ from src.config import (
     BATCH_SIZE,
     EMAIL_DELAY_BETWEEN_BATCH,
     TIMEZONE,
+    ensure_dirs,
 )
 from src.database.database_manager import DatabaseManager
 from src.modules.fresha_api import FreshaAPIClient
 from src.modules.email_service import EmailService
 from src.modules.alert_service import AlertService
-
-# Setup logging
+from src.modules.rate_limiter import TokenBucket
+from src.modules.uring_log_handler import make_log_handler
+
+# Setup logging. Emitting goes through a queue to a listener thread:
+# a logger call on the send loop only enqueues the record, so file
+# writes and their flushes never interleave with SMTP I/O on the hot
+# path. The MemoryHandler batches disk writes in groups of 64 records,
+# flushing immediately at WARNING and above, and the listener drains
+# everything at interpreter exit.
+ensure_dirs()
 log_file = LOG_DIR / "thank_you_script.log"
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(
+    _log_queue,
+    # On Linux with liburing the file handler batches writes through
+    # io_uring (one submission per ~16 KB of records); elsewhere it is
+    # a plain FileHandler
+    MemoryHandler(
+        64, flushLevel=logging.WARNING, target=make_log_handler(log_file)
+    ),
+    logging.StreamHandler(),
+)
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL),
     format=LOG_FORMAT,
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler(),
-    ],
+    handlers=[QueueHandler(_log_queue)],
 )
+_log_listener.start()
+# Stopped at exit rather than in run()'s finally so the scheduler can
+# invoke run() repeatedly against the same listener
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
+# The send times never change at runtime, so the " HH:MM:00" suffixes
+# are built once at import; per row the scheduled timestamp is a single
+# string concat onto the day's date
+_SCHEDULED_SUFFIXES = [f" {t}:00" for t in THANK_YOU_SEND_TIMES]
+
+# Constant per-email strings, hoisted out of the send loop
+_THANK_YOU_SUBJECT = "Thank You for Your Visit!"
+_THANK_YOU_TYPE = "thank_you"
+
 
 class ThankYouEmailAutomation:
     def __init__(self):
@@ -47,6 +82,22 @@ class ThankYouEmailAutomation:
         self.fresha_client = FreshaAPIClient()
         self.email_service = EmailService()
         self.alert_service = AlertService()
+        # Same average pace as the old fixed sleep (one batch per
+        # EMAIL_DELAY_BETWEEN_BATCH), but paid per message against real
+        # elapsed time instead of blocking a fixed interval per batch
+        self.rate_limiter = TokenBucket(
+            rate=BATCH_SIZE / EMAIL_DELAY_BETWEEN_BATCH, capacity=BATCH_SIZE
+        )
+        self.reset()
+
+    def reset(self):
+        """Clear per-run counters so the instance can be reused."""
+        # fresha_customer_id -> DB customer_id for this run: repeat
+        # visitors hit the UPSERT once instead of once per appointment
+        self._customer_cache = {}
+        # Guards stats: the ingest and send phases run on separate
+        # threads and both bump the shared counters
+        self._stats_lock = threading.Lock()
         self.stats = {
             "emails_sent": 0,
             "emails_skipped": 0,
@@ -54,6 +105,16 @@ class ThankYouEmailAutomation:
             "errors": [],
         }
 
+    def _bump(self, key: str, n: int = 1):
+        """Thread-safe counter increment."""
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _record_error(self, error_msg: str):
+        """Thread-safe error collection."""
+        with self._stats_lock:
+            self.stats["errors"].append(error_msg)
+
     def fetch_and_process_today_appointments(self):
         """Fetch today's completed appointments and prepare thank-you emails."""
         logger.info("Fetching today's completed appointments from Fresha...")
@@ -63,36 +124,53 @@ class ThankYouEmailAutomation:
             if not self.fresha_client.verify_connection():
                 error_msg = "Failed to verify Fresha API connection"
                 logger.error(error_msg)
-                self.stats["errors"].append(error_msg)
+                self._record_error(error_msg)
                 return False
 
-            # Get today's appointments
-            appointments = self.fresha_client.get_today_appointments()
-            logger.info(f"Found {len(appointments)} completed appointments today")
-
-            if not appointments:
-                logger.info("No appointments to process")
-                return True
-
-            # Process each appointment
-            for appointment in appointments:
+            # Stream today's appointments from the paging generator:
+            # processing overlaps with HTTP page fetches and only one
+            # page is held in memory, instead of waiting for the full
+            # list before the first row is handled. The schedule rows
+            # accumulate in _thank_you_rows and land in one transaction
+            # below instead of a commit per appointment × send time.
+            self._thank_you_rows = []
+            # One date computation for the whole run rather than one
+            # strftime per appointment per send time
+            today_str = datetime.now().date().isoformat()
+            appointment_count = 0
+            for appointment in self.fresha_client.iter_today_appointments():
+                appointment_count += 1
                 try:
-                    self._process_appointment(appointment)
+                    self._process_appointment(appointment, today_str)
                 except Exception as e:
                     error_msg = f"Error processing appointment {appointment.get('id')}: {str(e)}"
                     logger.error(error_msg)
-                    self.stats["errors"].append(error_msg)
+                    self._record_error(error_msg)
                     continue
 
+            logger.info(
+                "Processed %d completed appointments today", appointment_count
+            )
+            if not appointment_count:
+                logger.info("No appointments to process")
+                return True
+
+            if self._thank_you_rows:
+                scheduled = self.db_manager.add_thank_you_emails_bulk(
+                    self._thank_you_rows
+                )
+                logger.info("Scheduled %d thank-you emails", scheduled)
+                self._thank_you_rows = []
+
             return True
 
         except Exception as e:
             error_msg = f"Error fetching appointments: {str(e)}"
             logger.error(error_msg)
-            self.stats["errors"].append(error_msg)
+            self._record_error(error_msg)
             return False
 
-    def _process_appointment(self, appointment: dict):
+    def _process_appointment(self, appointment: dict, today_str: str):
         """Process a single appointment and create thank-you email record."""
         try:
             fresha_appointment_id = appointment.get("id")
@@ -103,24 +181,30 @@ class ThankYouEmailAutomation:
 
             if not customer_email:
                 logger.warning(
-                    f"No email found for appointment {fresha_appointment_id}"
+                    "No email found for appointment %s", fresha_appointment_id
                 )
-                self.stats["emails_skipped"] += 1
+                self._bump("emails_skipped")
                 return
 
-            # Add or update customer
-            customer_id = self.db_manager.add_customer(
-                fresha_id=fresha_customer_id,
-                name=customer_name,
-                email=customer_email,
-                phone=customer_data.get("phone"),
-            )
+            # Add or update customer (memoized per run: a customer with
+            # several same-day appointments costs one DB round trip)
+            customer_id = self._customer_cache.get(fresha_customer_id)
+            if customer_id is None:
+                customer_id = self.db_manager.add_customer(
+                    fresha_id=fresha_customer_id,
+                    name=customer_name,
+                    email=customer_email,
+                    phone=customer_data.get("phone"),
+                )
+                if customer_id:
+                    self._customer_cache[fresha_customer_id] = customer_id
 
             if not customer_id:
                 logger.error(
-                    f"Failed to add customer for appointment {fresha_appointment_id}"
+                    "Failed to add customer for appointment %s",
+                    fresha_appointment_id,
                 )
-                self.stats["emails_failed"] += 1
+                self._bump("emails_failed")
                 return
 
             # Add appointment
@@ -133,26 +217,25 @@ class ThankYouEmailAutomation:
 
             if not appointment_id:
                 logger.error(
-                    f"Failed to add appointment {fresha_appointment_id}"
+                    "Failed to add appointment %s", fresha_appointment_id
                 )
-                self.stats["emails_failed"] += 1
+                self._bump("emails_failed")
                 return
 
-            # Schedule thank-you emails for configured times
-            for send_time in THANK_YOU_SEND_TIMES:
-                scheduled_time = f"{datetime.now().strftime('%Y-%m-%d')} {send_time}:00"
-                self.db_manager.add_thank_you_email(
-                    appointment_id=appointment_id,
-                    customer_id=customer_id,
-                    email_address=customer_email,
-                    scheduled_time=scheduled_time,
+            # Schedule thank-you emails for configured times; rows are
+            # buffered and flushed in one bulk insert by the caller
+            for send_time, suffix in zip(THANK_YOU_SEND_TIMES, _SCHEDULED_SUFFIXES):
+                self._thank_you_rows.append(
+                    (appointment_id, customer_id, customer_email, today_str + suffix)
                 )
                 logger.info(
-                    f"Scheduled thank-you email for {customer_email} at {send_time}"
+                    "Scheduled thank-you email for %s at %s",
+                    customer_email,
+                    send_time,
                 )
 
         except Exception as e:
-            logger.error(f"Error processing appointment: {e}")
+            logger.error("Error processing appointment: %s", e)
             raise
 
     def send_pending_emails(self):
@@ -161,107 +244,145 @@ class ThankYouEmailAutomation:
         
         try:
             pending_emails = self.db_manager.get_pending_thank_you_emails()
-            logger.info(f"Found {len(pending_emails)} pending thank-you emails")
+            logger.info("Found %d pending thank-you emails", len(pending_emails))
 
             if not pending_emails:
                 logger.info("No pending emails to send")
                 return True
 
-            # Process in batches
+            # Process in batches, paced by the token bucket: the
+            # acquire sleeps only for whatever send time hasn't already
+            # covered the batch's token cost
             for i in range(0, len(pending_emails), BATCH_SIZE):
                 batch = pending_emails[i : i + BATCH_SIZE]
+                self.rate_limiter.acquire(len(batch))
                 self._send_email_batch(batch)
-                
-                # Delay between batches
-                if i + BATCH_SIZE < len(pending_emails):
-                    logger.info(
-                        f"Waiting {EMAIL_DELAY_BETWEEN_BATCH}s before next batch..."
-                    )
-                    time.sleep(EMAIL_DELAY_BETWEEN_BATCH)
 
             return True
 
         except Exception as e:
             error_msg = f"Error sending pending emails: {str(e)}"
             logger.error(error_msg)
-            self.stats["errors"].append(error_msg)
+            self._record_error(error_msg)
             return False
 
     def _send_email_batch(self, batch: list):
-        """Send a batch of emails."""
+        """Send a batch of emails over concurrent SMTP sessions.
+
+        Messages are built up front and handed to
+        EmailService.send_emails_async, where a handful of persistent
+        sessions work through them in parallel — batch wall time is
+        bounded by the slowest roundtrips rather than their sum. When
+        aiosmtplib isn't installed the batch falls back to sequential
+        sends over one persistent session.
+        """
+        messages = []
+        meta = []  # (email_id, customer_email, retry_count)
         for email_record in batch:
-            try:
-                email_id = email_record["id"]
-                customer_email = email_record["email_address"]
-                
-                # Get customer info for personalization
-                # Note: In real implementation, fetch from DB
-                customer_name = "Valued Customer"
-
-                # Send email
-                success, error = self.email_service.send_thank_you_email(
-                    recipient_email=customer_email, customer_name=customer_name
+            # Name comes joined from customers in the pending query
+            # — one round trip for the whole batch, not one per email
+            customer_name = email_record["customer_name"] or "Valued Customer"
+            messages.append(
+                self.email_service.build_thank_you_message(
+                    recipient_email=email_record["email_address"],
+                    customer_name=customer_name,
                 )
+            )
+            meta.append(
+                (
+                    email_record["id"],
+                    email_record["email_address"],
+                    email_record["retry_count"],
+                )
+            )
 
-                if success:
-                    self.db_manager.update_thank_you_email_status(
-                        email_id=email_id, status="sent"
-                    )
-                    self.db_manager.log_email(
-                        email_address=customer_email,
-                        email_type="thank_you",
-                        subject="Thank You for Your Visit!",
-                        status="sent",
+        try:
+            results = self.email_service.send_emails_async(messages)
+        except ImportError:
+            logger.info("aiosmtplib not available, sending sequentially")
+            results = self.email_service.send_messages(messages)
+
+        # Outcomes accumulate here and hit the database once per batch
+        # via the executemany bulk methods (two commits per batch
+        # instead of up to three per email); log_email is buffered.
+        # WAL mode, set at connection open, lets monitor reads proceed
+        # during the batch commit.
+        sent_ids = []
+        failed_updates = []  # (status, error_message, email_id)
+        retry_ids = []
+        # Log rows are built as positional tuples in email_logs column
+        # order — no per-row kwargs dict through log_email — and land
+        # in one executemany at the end of the batch
+        log_rows = []  # (email_address, type, subject, status, error, appt_id)
+        for (email_id, customer_email, retry_count), (success, error) in zip(
+            meta, results
+        ):
+            if success:
+                sent_ids.append(email_id)
+                log_rows.append(
+                    (customer_email, _THANK_YOU_TYPE, _THANK_YOU_SUBJECT,
+                     "sent", None, None)
+                )
+                self._bump("emails_sent")
+                logger.info("Thank-you email sent to %s", customer_email)
+            else:
+                retry_ids.append(email_id)
+
+                if retry_count < 2:
+                    logger.warning(
+                        "Failed to send email to %s, will retry", customer_email
                     )
-                    self.stats["emails_sent"] += 1
-                    logger.info(f"Thank-you email sent to {customer_email}")
+                    self._bump("emails_skipped")
                 else:
-                    # Increment retry count
-                    self.db_manager.increment_thank_you_retry(email_id)
-                    email_record_dict = dict(email_record)
-                    retry_count = email_record_dict.get("retry_count", 0)
-
-                    if retry_count < 2:
-                        logger.warning(
-                            f"Failed to send email to {customer_email}, will retry"
-                        )
-                        self.stats["emails_skipped"] += 1
-                    else:
-                        self.db_manager.update_thank_you_email_status(
-                            email_id=email_id, status="failed", error_message=error
-                        )
-                        self.stats["emails_failed"] += 1
-                        logger.error(
-                            f"Failed to send email to {customer_email} after retries: {error}"
-                        )
-
-                    self.db_manager.log_email(
-                        email_address=customer_email,
-                        email_type="thank_you",
-                        subject="Thank You for Your Visit!",
-                        status="failed",
-                        error_message=error,
+                    failed_updates.append(("failed", error, email_id))
+                    self._bump("emails_failed")
+                    logger.error(
+                        "Failed to send email to %s after retries: %s",
+                        customer_email,
+                        error,
                     )
 
-            except Exception as e:
-                error_msg = f"Error sending email in batch: {str(e)}"
-                logger.error(error_msg)
-                self.stats["errors"].append(error_msg)
+                log_rows.append(
+                    (customer_email, _THANK_YOU_TYPE, _THANK_YOU_SUBJECT,
+                     "failed", error, None)
+                )
+
+        if retry_ids:
+            self.db_manager.increment_thank_you_retries_bulk(retry_ids)
+        # Successes are homogeneous, so one IN-list UPDATE covers them;
+        # failures carry per-row error messages and stay on executemany
+        self.db_manager.bulk_mark_thank_you_sent(sent_ids)
+        if failed_updates:
+            self.db_manager.update_thank_you_email_statuses_bulk(failed_updates)
+        if log_rows:
+            self.db_manager.log_emails_bulk(log_rows)
 
     def run(self):
         """Main execution method."""
+        self.reset()
         start_time = time.time()
         logger.info("=" * 60)
         logger.info("Starting Thank You Email Automation Script")
         logger.info("=" * 60)
 
         try:
-            # Fetch and process appointments
-            if not self.fetch_and_process_today_appointments():
-                logger.error("Failed to fetch and process appointments")
+            # The two phases are independent — pending emails come from
+            # earlier runs, while today's ingestion schedules for later
+            # send times — so they overlap on two threads and total wall
+            # time is max(ingest, send) instead of their sum. The
+            # connection pool hands each thread its own connection and
+            # stats updates go through the lock-guarded helpers.
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                fetch_future = executor.submit(
+                    self.fetch_and_process_today_appointments
+                )
+                send_future = executor.submit(self.send_pending_emails)
+                fetch_ok = fetch_future.result()
+                send_ok = send_future.result()
 
-            # Send pending emails
-            if not self.send_pending_emails():
+            if not fetch_ok:
+                logger.error("Failed to fetch and process appointments")
+            if not send_ok:
                 logger.error("Failed to send pending emails")
 
             # Calculate execution time
@@ -290,10 +411,10 @@ class ThankYouEmailAutomation:
                 )
 
             logger.info("=" * 60)
-            logger.info(f"✓ Emails Sent: {self.stats['emails_sent']}")
-            logger.info(f"⊘ Emails Skipped: {self.stats['emails_skipped']}")
-            logger.info(f"✗ Emails Failed: {self.stats['emails_failed']}")
-            logger.info(f"⏱ Execution Time: {execution_time:.2f}s")
+            logger.info("✓ Emails Sent: %d", self.stats["emails_sent"])
+            logger.info("⊘ Emails Skipped: %d", self.stats["emails_skipped"])
+            logger.info("✗ Emails Failed: %d", self.stats["emails_failed"])
+            logger.info("⏱ Execution Time: %.2fs", execution_time)
             logger.info("=" * 60)
 
             return (
@@ -302,7 +423,7 @@ class ThankYouEmailAutomation:
             )
 
         except Exception as e:
-            logger.error(f"Fatal error in automation: {str(e)}", exc_info=True)
+            logger.error("Fatal error in automation: %s", e, exc_info=True)
             self.alert_service.send_alert(
                 subject="Thank You Email Script - Fatal Error",
                 body=str(e),
@@ -310,6 +431,10 @@ class ThankYouEmailAutomation:
             )
             return False
 
+        finally:
+            # Persist buffered email log rows even on a fatal error
+            self.db_manager.flush_logs()
+
 
 def main():
     """Entry point."""
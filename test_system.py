@@ -5,6 +5,8 @@ Helps verify all components are working correctly before production deployment.
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
@@ -20,11 +22,39 @@ from src.modules.fresha_api import FreshaAPIClient
 from src.modules.email_service import EmailService
 from src.modules.alert_service import AlertService
 
+# Constant check lists hoisted to module scope: built once at import
+# instead of reallocated on every test call
+CONFIG_VARS = (
+    ("FRESHA_API_KEY", FRESHA_API_KEY),
+    ("SENDER_EMAIL", SENDER_EMAIL),
+    ("ALERT_EMAIL", ALERT_EMAIL),
+)
+
+REQUIRED_TABLES = (
+    "customers",
+    "appointments",
+    "thank_you_emails",
+    "followup_emails",
+    "script_logs",
+    "email_logs",
+)
+REQUIRED_TABLES_SET = frozenset(REQUIRED_TABLES)
+
 
 class TestSuite:
     def __init__(self):
         self.results = []
-        self.db = DatabaseManager()
+
+    @cached_property
+    def db(self):
+        """Database manager, created on first use.
+
+        Only test_database touches it, so constructing the suite no
+        longer opens the DB (and initializes the schema) up front — and
+        a broken DB path fails that one test instead of aborting all of
+        them in __init__.
+        """
+        return DatabaseManager()
 
     def print_header(self, title):
         """Print test header."""
@@ -32,133 +62,128 @@ class TestSuite:
         print(f"  {title}")
         print(f"{'=' * 60}\n")
 
-    def add_result(self, test_name, passed, message=""):
-        """Record test result."""
+    def print_result(self, test_name, passed, message=""):
+        """Print a single test result."""
         status = "✓ PASS" if passed else "✗ FAIL"
-        self.results.append((test_name, passed, message))
         print(f"{status}: {test_name}")
         if message:
             print(f"       {message}")
 
     def test_configuration(self):
         """Test configuration loading."""
-        self.print_header("Configuration Tests")
-
-        # Test required env variables
-        tests = [
-            ("FRESHA_API_KEY", FRESHA_API_KEY),
-            ("SENDER_EMAIL", SENDER_EMAIL),
-            ("ALERT_EMAIL", ALERT_EMAIL),
-        ]
+        results = []
 
-        for var_name, var_value in tests:
+        # Test required env variables. The message is built only on the
+        # failure path; the pass path previously formatted and sliced a
+        # preview string just to throw it away.
+        for var_name, var_value in CONFIG_VARS:
             passed = bool(var_value) and var_value != ""
-            message = f"Value: {var_value[:20]}..." if var_value else "Not configured"
-            self.add_result(
-                f"Environment variable: {var_name}",
-                passed,
-                message if not passed else "",
+            results.append(
+                (
+                    f"Environment variable: {var_name}",
+                    passed,
+                    "" if passed else "Not configured",
+                )
             )
 
+        return results
+
     def test_database(self):
         """Test database functionality."""
-        self.print_header("Database Tests")
+        results = []
 
         # Test database file exists
         db_exists = DATABASE_PATH.exists()
-        self.add_result(
-            f"Database file exists",
-            db_exists,
-            f"Path: {DATABASE_PATH}",
+        results.append(
+            (
+                "Database file exists",
+                db_exists,
+                f"Path: {DATABASE_PATH}",
+            )
         )
 
         if db_exists:
-            # Test database connection
+            # Test database connection. One query serves both the
+            # connection check and the membership tests below, instead
+            # of acquiring a connection and re-running the identical
+            # sqlite_master scan twice.
             try:
                 with self.db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "SELECT name FROM sqlite_master WHERE type='table'"
+                    table_names = frozenset(
+                        row[0]
+                        for row in conn.execute(
+                            "SELECT name FROM sqlite_master WHERE type='table'"
+                        )
                     )
-                    tables = cursor.fetchall()
-                    
-                self.add_result(
-                    "Database connection",
-                    len(tables) > 0,
-                    f"Found {len(tables)} tables",
-                )
-
-                # Test required tables exist
-                required_tables = [
-                    "customers",
-                    "appointments",
-                    "thank_you_emails",
-                    "followup_emails",
-                    "script_logs",
-                    "email_logs",
-                ]
 
-                with self.db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "SELECT name FROM sqlite_master WHERE type='table'"
+                results.append(
+                    (
+                        "Database connection",
+                        bool(table_names),
+                        f"Found {len(table_names)} tables",
                     )
-                    table_names = [row[0] for row in cursor.fetchall()]
+                )
 
-                for table in required_tables:
-                    self.add_result(
-                        f"Table exists: {table}",
-                        table in table_names,
+                # Test required tables exist: one set difference names
+                # every missing table up front, then the per-table
+                # checks are O(1) probes of the same frozenset
+                missing = REQUIRED_TABLES_SET - table_names
+                results.append(
+                    (
+                        "All required tables present",
+                        not missing,
+                        f"Missing: {', '.join(sorted(missing))}" if missing else "",
                     )
+                )
+                for table in REQUIRED_TABLES:
+                    results.append((f"Table exists: {table}", table in table_names, ""))
 
             except Exception as e:
-                self.add_result(
-                    "Database connection",
-                    False,
-                    str(e),
-                )
+                results.append(("Database connection", False, str(e)))
+
+        return results
 
     def test_fresha_api(self):
         """Test Fresha API integration."""
-        self.print_header("Fresha API Tests")
+        results = []
 
         try:
             client = FreshaAPIClient()
 
             # Test API connection
             connection_ok = client.verify_connection()
-            self.add_result(
-                "API connection to Fresha",
-                connection_ok,
-                "Verify FRESHA_API_KEY and FRESHA_BUSINESS_ID if failed",
+            results.append(
+                (
+                    "API connection to Fresha",
+                    connection_ok,
+                    ""
+                    if connection_ok
+                    else "Verify FRESHA_API_KEY and FRESHA_BUSINESS_ID",
+                )
             )
 
             if connection_ok:
                 # Test fetching appointments
                 try:
                     appointments = client.get_today_appointments()
-                    self.add_result(
-                        "Fetch today's appointments",
-                        isinstance(appointments, list),
-                        f"Retrieved {len(appointments)} appointments",
+                    results.append(
+                        (
+                            "Fetch today's appointments",
+                            isinstance(appointments, list),
+                            f"Retrieved {len(appointments)} appointments",
+                        )
                     )
                 except Exception as e:
-                    self.add_result(
-                        "Fetch today's appointments",
-                        False,
-                        str(e),
-                    )
+                    results.append(("Fetch today's appointments", False, str(e)))
 
         except Exception as e:
-            self.add_result(
-                "Fresha API initialization",
-                False,
-                str(e),
-            )
+            results.append(("Fresha API initialization", False, str(e)))
+
+        return results
 
     def test_email_service(self):
         """Test email service configuration."""
-        self.print_header("Email Service Tests")
+        results = []
 
         try:
             service = EmailService()
@@ -169,87 +194,93 @@ class TestSuite:
                 and service.sender_password
                 and service.smtp_server
             )
-            self.add_result(
-                "Email configuration loaded",
-                config_ok,
-                "Check SENDER_EMAIL, SENDER_PASSWORD, SMTP_SERVER in .env",
+            results.append(
+                (
+                    "Email configuration loaded",
+                    config_ok,
+                    ""
+                    if config_ok
+                    else "Check SENDER_EMAIL, SENDER_PASSWORD, SMTP_SERVER in .env",
+                )
             )
 
             if config_ok:
                 # Test SMTP settings
-                self.add_result(
-                    "SMTP server configured",
-                    bool(service.smtp_server),
-                    f"Server: {service.smtp_server}:{service.smtp_port}",
+                results.append(
+                    (
+                        "SMTP server configured",
+                        bool(service.smtp_server),
+                        f"Server: {service.smtp_server}:{service.smtp_port}",
+                    )
                 )
 
                 # Note: We can't test actual sending without auth, but we validate config
-                self.add_result(
-                    "Sender details configured",
-                    service.sender_email and service.sender_name,
-                    f"From: {service.sender_name} <{service.sender_email}>",
+                results.append(
+                    (
+                        "Sender details configured",
+                        service.sender_email and service.sender_name,
+                        f"From: {service.sender_name} <{service.sender_email}>",
+                    )
                 )
 
         except Exception as e:
-            self.add_result(
-                "Email service initialization",
-                False,
-                str(e),
-            )
+            results.append(("Email service initialization", False, str(e)))
+
+        return results
 
     def test_alert_service(self):
         """Test alert service configuration."""
-        self.print_header("Alert Service Tests")
+        results = []
 
         try:
             alert = AlertService()
 
             # Test alert configuration
             alert_configured = bool(alert.alert_email)
-            self.add_result(
-                "Alert email configured",
-                alert_configured,
-                f"Alert email: {alert.alert_email}" if alert_configured else "Set ALERT_EMAIL in .env",
+            results.append(
+                (
+                    "Alert email configured",
+                    alert_configured,
+                    f"Alert email: {alert.alert_email}"
+                    if alert_configured
+                    else "Set ALERT_EMAIL in .env",
+                )
             )
 
         except Exception as e:
-            self.add_result(
-                "Alert service initialization",
-                False,
-                str(e),
-            )
+            results.append(("Alert service initialization", False, str(e)))
+
+        return results
 
     def test_script_imports(self):
         """Test that automation scripts can be imported."""
-        self.print_header("Script Import Tests")
+        results = []
 
         try:
             from src.scripts.thank_you_emails import ThankYouEmailAutomation
-            self.add_result(
-                "Import ThankYouEmailAutomation",
-                True,
-                "Script can be imported successfully",
+            results.append(
+                (
+                    "Import ThankYouEmailAutomation",
+                    True,
+                    "Script can be imported successfully",
+                )
             )
         except Exception as e:
-            self.add_result(
-                "Import ThankYouEmailAutomation",
-                False,
-                str(e),
-            )
+            results.append(("Import ThankYouEmailAutomation", False, str(e)))
 
         try:
             from src.scripts.followup_emails import FollowUpEmailAutomation
-            self.add_result(
-                "Import FollowUpEmailAutomation",
-                True,
-                "Script can be imported successfully",
+            results.append(
+                (
+                    "Import FollowUpEmailAutomation",
+                    True,
+                    "Script can be imported successfully",
+                )
             )
         except Exception as e:
-            self.add_result(
-                "Import FollowUpEmailAutomation",
-                False,
-                str(e),
-            )
+            results.append(("Import FollowUpEmailAutomation", False, str(e)))
+
+        return results
 
     def print_summary(self):
         """Print test summary."""
@@ -284,12 +315,27 @@ class TestSuite:
         self.print_header("Running Complete Test Suite")
         print("Testing all components of your Nail Salon Automation System\n")
 
-        self.test_configuration()
-        self.test_database()
-        self.test_fresha_api()
-        self.test_email_service()
-        self.test_alert_service()
-        self.test_script_imports()
+        # The tests are independent and dominated by I/O (Fresha HTTP,
+        # DB open, module imports), so they run concurrently; wall time
+        # approaches the slowest test instead of the sum. Each test
+        # returns its results, which are printed grouped per test in
+        # the original order once its future resolves.
+        tests = (
+            ("Configuration Tests", self.test_configuration),
+            ("Database Tests", self.test_database),
+            ("Fresha API Tests", self.test_fresha_api),
+            ("Email Service Tests", self.test_email_service),
+            ("Alert Service Tests", self.test_alert_service),
+            ("Script Import Tests", self.test_script_imports),
+        )
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            futures = [executor.submit(test) for _, test in tests]
+            for (title, _), future in zip(tests, futures):
+                results = future.result()
+                self.print_header(title)
+                for test_name, test_passed, message in results:
+                    self.print_result(test_name, test_passed, message)
+                self.results.extend(results)
 
         success = self.print_summary()
         return success
@@ -299,7 +345,7 @@ def main():
     """Main entry point."""
     suite = TestSuite()
     success = suite.run_all()
-    
+
     sys.exit(0 if success else 1)
 
 